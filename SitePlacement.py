@@ -1,13 +1,23 @@
-import random
+import base64
+import glob
+import hashlib
+import itertools
+import json
+import numpy
+import os
+import shapely
+import time
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 from aecSpace.aecColor import aecColor
 from aecSpace.aecPoint import aecPoint
+from aecSpace.aecRandom import aecRandom
+from aecSpace.aecResultCache import aecResultCache
 from aecSpace.aecSpace import aecSpace
-from aecSpace.aecShaper import aecShaper
+from aecSpace.aecSpaceGLTF import aecSpaceGLTF
 from aecSpace.aecSpacer import aecSpacer
 
-from hypar import glTF
-
 siteBoundary = \
 {
      "type": "Polygon",
@@ -21,21 +31,52 @@ siteBoundary = \
         [2000.1994, 2289.2733],
      ]
 }
+
+siteMaterials = \
+[
+    (0.0, 0.631, 0.945, 0.9, 1.0, "Blue"),
+    (0.486, 0.733, 0.0, 0.9, 0.0, "Green"),
+    (0.964, 0.325, 0.078, 0.9, 1.0, "Orange"),
+    (1.0, 0.733, 0.0, 0.9, 1.0, "Yellow"),
+]
+colorBlue, colorGreen, colorOrange, colorYellow = range(0, 4)
+
+siteParameters = ('length', 'width', 'height', 'rotation', 'area')
+sitePath = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hypar.json')
+
+# Per-process site and site mesh shared by every sweep task a worker runs.
+
+sweepState = {}
+
+# Result caches opened by sitePlacement, by path, and the digest of the library
+# source. A cache path may also be delivered in the SITE_PLACEMENT_CACHE variable.
+
+cacheState = {}
+cacheVariable = 'SITE_PLACEMENT_CACHE'
   
 def makeBuilding(site: aecSpace, length: float, width: float, height: float, 
-                                 rotation: float, area: float):
+                                 rotation: float, area: float, rng: aecRandom = None,
+                                 timings: dict = None):
+    if timings is not None: start = time.perf_counter()
     spacer = aecSpacer()
-    building = aecSpace()
-    shaper = aecShaper()
-    points = shaper.makeBox(aecPoint(0, 0, 0), xSize = length, ySize = width)
-    building.boundary = points
+    building = aecSpace.fromArray([(0, 0), (length, 0), (length, width), (0, width)])
     building.rotate(rotation)
-    if spacer.placeWithin(building, site):
-        building.level = 0
-        building.height = height
-        building = [building]
-        building += spacer.stackToArea(building[0], area) 
+    placed = spacer.placeWithin(building, site, rng, exact = True)
+    if timings is not None:
+        start = stageTime(timings, 'placement', start)
+        timings['counters']['trials'] = spacer.trials
+    if not placed: return None
+    building.level = 0
+    building.height = height
+    building = spacer.stackPrismToArea(building, area)
+    if timings is not None: stageTime(timings, 'stacking', start)
     return building
+
+def makeModel(siteMesh, materials):
+    model = aecSpaceGLTF()
+    for material in materials: model.addMaterial(*material)
+    model.addNode(model.addMesh(siteMesh), colorGreen, 'Site')
+    return model
     
 def makeSite():
     site = aecSpace()
@@ -45,30 +86,273 @@ def makeSite():
     site.height = 20 
     return site     
 
-def sitePlacement(length: float, width: float, height: float, 
-                  rotation: float, area: float):
+def modelOutput(model, output = None, timings: dict = None):
+    """
+    Returns an aecSpaceGLTF or a base64 GLB string as a base64 string if
+    output is None, or as GLB bytes if output is 'glb'. Otherwise writes the
+    GLB to the path or binary file-like object delivered as output, streaming
+    an aecSpaceGLTF chunk by chunk, and returns output.
+    Records the count of bytes returned or written in the delivered timings.
+    """
+    if isinstance(model, aecSpaceGLTF):
+        if output is None: result = model.getBase64()
+        elif output == 'glb': result = model.getGLB()
+        else:
+            written = model.write(output)
+            if written is None: raise IOError('Unable to write the model to {!r}'.format(output))
+            if timings is not None: timings['counters']['bytes'] = written
+            return output
+        if timings is not None: timings['counters']['bytes'] = len(result)
+        return result
+    if output is None: result = model
+    else:
+        result = base64.b64decode(model)
+        if output != 'glb':
+            if isinstance(output, (str, bytes, os.PathLike)):
+                with open(output, 'wb') as file: file.write(result)
+            else: output.write(result)
+            if timings is not None: timings['counters']['bytes'] = len(result)
+            return output
+    if timings is not None: timings['counters']['bytes'] = len(result)
+    return result
+
+def modelBuilding(site: aecSpace, siteMesh, materials, length: float, width: float, 
+                  height: float, rotation: float, area: float, seed = None, timings: dict = None):
+    """
+    Places a building on the site and returns the aecSpaceGLTF model 
+    of the site and building with the computed floors and area.
+    """
+    rng = aecRandom(seed)
+    building = makeBuilding(site, length, width, height, rotation, area, rng, timings)
+    if timings is not None: start = time.perf_counter()
+    if building is not None:
+        floorMesh = building.space.mesh_arrays
+        if timings is not None: start = stageTime(timings, 'meshing', start)
+    model = makeModel(siteMesh, materials)
+    computed = {'floors':0, 'area':0}
+    if building is not None:
+        floorIndex = model.addMesh(floorMesh)
+        for index, offset in enumerate(building.offsets.tolist()):
+            colorIndex = rng.randint(0, 2)
+            if colorIndex == 0: color = colorBlue
+            if colorIndex == 1: color = colorOrange
+            if colorIndex == 2: color = colorYellow
+            model.addNode(floorIndex, color, 'Floor {}'.format(index + 1), (0, 0, offset))
+        computed = {'floors':building.count, 'area':building.area}
+    if timings is not None: 
+        start = stageTime(timings, 'model', start)
+        counters = timings['counters']
+        counters['floors'] = computed['floors']
+        counters['vertices'] = len(siteMesh.vertices)
+        counters['triangles'] = len(siteMesh.indices)
+        if building is not None:
+            counters['vertices'] += len(floorMesh.vertices) * building.count
+            counters['triangles'] += len(floorMesh.indices) * building.count
+    return model, computed
+
+def placeBuilding(site: aecSpace, siteMesh, materials, length: float, width: float, 
+                  height: float, rotation: float, area: float, seed = None, output = None,
+                  timings: dict = None):
+    model, computed = modelBuilding(site, siteMesh, materials, 
+                                    length, width, height, rotation, area, seed, timings)
+    if timings is not None: start = time.perf_counter()
+    result = {"model": modelOutput(model, output, timings), 'computed':computed}
+    if timings is not None: stageTime(timings, 'encoding', start)
+    return result
+
+def placementCache(cache = None) -> aecResultCache:
+    """
+    Returns the delivered aecResultCache, or the cache at the delivered path
+    or at the path in the SITE_PLACEMENT_CACHE variable, opening each path once.
+    Returns None if no cache is delivered or configured.
+    """
+    if cache is None: cache = os.environ.get(cacheVariable) or None
+    if cache is None or isinstance(cache, aecResultCache): return cache
+    path = os.path.abspath(os.fspath(cache))
+    if path not in cacheState: cacheState[path] = aecResultCache(path)
+    return cacheState[path]
+
+def placementKey(length: float, width: float, height: float, 
+                 rotation: float, area: float, seed = None) -> str:
+    """
+    Returns a hash of the normalized parameters and seed, the site, the materials,
+    and the source and dependency versions of the library, identifying a result.
+    Returns None for unseeded placements and seeds that are not an integer or
+    string, whose results cannot be reproduced.
+    """
+    if isinstance(seed, numpy.integer): seed = int(seed)
+    if isinstance(seed, bool) or not isinstance(seed, (int, str)): return None
+    if 'source' not in cacheState:
+        digest = hashlib.sha256()
+        root = os.path.dirname(os.path.abspath(__file__))
+        paths = [os.path.abspath(__file__)] + sorted(glob.glob(os.path.join(root, 'aecSpace', '*.py')))
+        for path in paths:
+            with open(path, 'rb') as file: digest.update(file.read())
+        cacheState['source'] = digest.hexdigest()
+    key = \
+    {
+        'params': [float(value) for value in (length, width, height, rotation, area)],
+        'seed': seed,
+        'site': siteBoundary['coordinates'],
+        'materials': siteMaterials,
+        'source': cacheState['source'],
+        'versions': [numpy.__version__, shapely.__version__],
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys = True).encode('utf-8')).hexdigest()
+
+def modelOnSite(length: float, width: float, height: float, rotation: float, area: float, 
+                seed = None, timings: dict = None):
+    if timings is not None: start = time.perf_counter()
+    site = makeSite()
+    siteMesh = site.mesh_arrays
+    if timings is not None: stageTime(timings, 'site', start)
+    return modelBuilding(site, siteMesh, siteMaterials, 
+                         length, width, height, rotation, area, seed, timings)
+
+def sitePlacement(length: float, width: float, height: float, rotation: float, area: float, 
+                  seed = None, cache = None, output = None, timings: bool = False):
+    """
+    Places a building on the site and returns the model with the computed 
+    floors and area. The model is a base64 GLB string by default, GLB bytes
+    if output is 'glb', or is written as GLB to the path or binary file-like
+    object delivered as output, which is returned in its place.
+    With a cache, or a cache path here or in the SITE_PLACEMENT_CACHE variable,
+    a seeded placement computed before is returned from the cache without 
+    building any geometry, and a new one is stored in it after the model is
+    delivered, so a model written to a path or file is streamed from the model
+    itself rather than from a decoded copy of the cache entry.
+    If timings is True, the result also holds a 'timings' block of the seconds
+    spent in each stage and counters of the placement trials, floors, vertices,
+    triangles, and bytes of the delivered model, and whether it was found in
+    the cache. The model is encoded once for the output, timed as 'encoding',
+    and once more as base64 for a new cache entry, timed as 'cache_encoding',
+    only if the output is not already base64.
+    """
+    stages = None
+    if timings: 
+        stages = {'seconds': {}, 'counters': {}}
+        begin = time.perf_counter()
+    cache = placementCache(cache)
+    key = None
+    if cache is not None: key = placementKey(length, width, height, rotation, area, seed)
+    result = None
+    if key is not None:
+        if stages is not None: start = time.perf_counter()
+        result = cache.get(key)
+        if stages is not None: 
+            stageTime(stages, 'cache', start)
+            stages['counters']['cached'] = result is not None
+    if result is not None:
+        if stages is not None: start = time.perf_counter()
+        result['model'] = modelOutput(result['model'], output, stages)
+        if stages is not None: stageTime(stages, 'encoding', start)
+    else:
+        model, computed = modelOnSite(length, width, height, rotation, area, seed, stages)
+        if stages is not None: start = time.perf_counter()
+        result = {'model': modelOutput(model, output, stages), 'computed': computed}
+        if stages is not None: start = stageTime(stages, 'encoding', start)
+        if key is not None:
+            entry = result['model']
+            if output is not None: 
+                entry = model.getBase64()
+                if stages is not None: start = stageTime(stages, 'cache_encoding', start)
+            cache.put(key, {'model': entry, 'computed': computed})
+            if stages is not None: stageTime(stages, 'cache', start)
+    if stages is not None:
+        stages['seconds']['total'] = time.perf_counter() - begin
+        result['timings'] = stages
+    return result
+
+def sitePlacementBatch(params):
+    """
+    Yields one sitePlacement result per parameter set, building the site
+    and its mesh only once for the whole batch.
+    Each parameter set is either a dictionary keyed by the hypar.json
+    parameter names and optionally 'seed', or a sequence of 
+    (length, width, height, rotation, area[, seed]).
+    """
+    site = makeSite()
+    siteMesh = site.mesh_arrays
+    for param in params:
+        yield placeBuilding(site, siteMesh, siteMaterials, **siteParams(param))
+
+def sitePlacementGrid(path: str = sitePath):
+    """
+    Yields every parameter combination of the min/max/step grid declared
+    in hypar.json as a dictionary suitable for sitePlacementBatch.
+    """
+    with open(path) as file: parameters = json.load(file)['parameters']
+    axes = []
+    for name in siteParameters:
+        bounds = parameters[name]
+        values = []
+        value = bounds['min']
+        while value <= bounds['max']:
+            values.append(value)
+            value += bounds['step']
+        axes.append(values)
+    for values in itertools.product(*axes): 
+        yield dict(zip(siteParameters, values))
+
+def sitePlacementSweep(params = None, workers: int = None, chunksize: int = None,
+                       ordered: bool = True, seed: int = 0):
+    """
+    Spreads sitePlacement over a pool of worker processes, yielding
+    (index, result) pairs where index is the position of the parameter set
+    in params. Defaults to the full hypar.json grid.
+    Tasks are submitted in chunks of chunksize parameter sets. If ordered is
+    False, results are yielded as soon as each chunk completes.
+    Each task without its own seed is seeded from seed and its index, so any
+    task can be reproduced with sitePlacement independently of the worker that
+    ran it. A seed of None leaves such tasks unseeded.
+    """
+    if params is None: params = sitePlacementGrid()
+    tasks = []
+    for index, param in enumerate(params):
+        param = dict(siteParams(param))
+        param.setdefault('seed', sweepSeed(seed, index))
+        tasks.append((index, param))
+    if not tasks: return
+    if not workers: workers = os.cpu_count() or 1
+    if not chunksize: chunksize = max(1, -(-len(tasks) // (workers * 4)))
+    with ProcessPoolExecutor(max_workers = workers, initializer = sweepInit) as executor:
+        futures = [executor.submit(sweepChunk, tasks[index:index + chunksize])
+                   for index in range(0, len(tasks), chunksize)]
+        if not ordered: futures = as_completed(futures)
+        for future in futures:
+            for result in future.result(): yield result
+
+def siteParams(param) -> dict:
+    if isinstance(param, dict): return param
+    return dict(zip(siteParameters + ('seed',), param))
+
+def stageTime(timings: dict, stage: str, start: float) -> float:
+    """
+    Adds the seconds elapsed since start to the stage in the 
+    delivered timings and returns the current time.
+    """
+    now = time.perf_counter()
+    timings['seconds'][stage] = timings['seconds'].get(stage, 0.0) + (now - start)
+    return now
+
+def sweepChunk(tasks: list) -> list:
+    if not sweepState: sweepInit()
+    site = sweepState['site']
+    siteMesh = sweepState['mesh']
+    results = []
+    for index, param in tasks:
+        results.append((index, placeBuilding(site, siteMesh, siteMaterials, **param)))
+    return results
+
+def sweepInit():
     site = makeSite()
-    building = makeBuilding(site, length, width, height, rotation, area)
-    area = 0
-    floors = 0
-    for space in building:
-        area += space.area
-        floors += 1
-    model = glTF()
-    colorBlue = model.add_material(0.0, 0.631, 0.945, 0.9, 1.0, "Blue")
-    colorGreen = model.add_material(0.486, 0.733, 0.0, 0.9, 0.0, "Green")
-    colorOrange = model.add_material(0.964, 0.325, 0.078, 0.9, 1.0, "Orange")
-    colorYellow = model.add_material(1.0, 0.733, 0.0, 0.9, 1.0, "Yellow")
-    spaceMesh = site.mesh_graphic
-    model.add_triangle_mesh(spaceMesh.vertices, spaceMesh.normals, spaceMesh.indices, colorGreen)
-    for space in building:
-        spaceMesh = space.mesh_graphic
-        colorIndex = random.randint(0, 2)
-        if colorIndex == 0: color = colorBlue
-        if colorIndex == 1: color = colorOrange
-        if colorIndex == 2: color = colorYellow      
-        model.add_triangle_mesh(spaceMesh.vertices, spaceMesh.normals, spaceMesh.indices, color)   
-    return {"model": model.save_base64(), 'computed':{'floors':floors, 'area':area}}   
+    sweepState['site'] = site
+    sweepState['mesh'] = site.mesh_arrays
+
+def sweepSeed(seed: int, index: int) -> int:
+    if seed is None: return None
+    digest = hashlib.sha256('{}:{}'.format(seed, index).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'little')
 #    model.save_glb('model.glb')
 #
 #sitePlacement(length = random.uniform(200, 400), 
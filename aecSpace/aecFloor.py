@@ -1,5 +1,8 @@
+import numpy
 import traceback
 
+from typing import List
+
 from aecSpace.aecCorridor import aecCorridor
 from aecSpace.aecGeometry import aecGeometry
 from aecSpace.aecPoint import aecPoint
@@ -36,6 +39,28 @@ class aecFloor():
             self.__floor.level = 0.0
             self.__corridor.space.height = 4000
 
+    def __corridorAdjacent(self, rooms: List[aecSpace]) -> List[bool]:
+        """
+        Returns whether each room lies within 20 units of the corridor, the
+        reach of aecGeometry.areAdjacent, from one spatial query of the corridor.
+        """
+        polygons = [room.boundary for room in rooms]
+        neighbors = set(self.__geometry.getNeighbors(self.corridor.space.boundary, polygons, tolerance = 20))
+        return [index in neighbors for index in range(len(rooms))]
+
+    def __makeRooms(self, xPnt: float, yPnt: float, xRoom: float, yRoom: float, 
+                    count: int, x: float = 0, y: float = 0) -> List[aecSpace]:
+        """
+        Creates a row of count rectangular rooms of xRoom by yRoom, the first with
+        its southwest corner at (xPnt, yPnt) and each next displaced by x and y.
+        """
+        room = numpy.array([[xPnt, yPnt], 
+                            [xPnt + xRoom, yPnt], 
+                            [xPnt + xRoom, yPnt + yRoom], 
+                            [xPnt, yPnt + yRoom]])
+        offsets = numpy.arange(count)[:, numpy.newaxis, numpy.newaxis] * numpy.array([x, y])
+        return aecSpace.fromArrays(room + offsets)
+
     @property
     def corridor(self) -> aecSpace:
         """
@@ -156,14 +181,7 @@ class aecFloor():
                 yRoom = ySize / roomsWest
                 xPnt = floorBox.SW.x
                 yPnt = origin.y
-                oRoom = aecPoint(xPnt, yPnt)
-                points = self.__shaper.makeBox(origin = oRoom, 
-                                               xSize = xRoom, 
-                                               ySize = yRoom) 
-                if not points: raise Exception
-                room = aecSpace()
-                room.boundary = points
-                westRooms = [room] + self.__spacer.place(room, roomsWest - 1, y = yRoom)
+                westRooms = self.__makeRooms(xPnt, yPnt, xRoom, yRoom, roomsWest, y = yRoom)
                 westRooms.reverse()
             
             # Create the Eastern rooms
@@ -173,14 +191,7 @@ class aecFloor():
                 xRoom = abs(floorBox.SE.x - (origin.x + self.corridor.width))
                 yRoom = ySize / roomsEast            
                 xPnt = origin.x + self.corridor.width
-                oRoom = aecPoint(xPnt, yPnt)
-                points = self.__shaper.makeBox(origin = oRoom, 
-                                               xSize = xRoom, 
-                                               ySize = yRoom) 
-                if not points: raise Exception
-                room = aecSpace()
-                room.boundary = points
-                eastRooms = [room] + self.__spacer.place(room, roomsEast - 1, y = yRoom)
+                eastRooms = self.__makeRooms(xPnt, yPnt, xRoom, yRoom, roomsEast, y = yRoom)
             
             # Create the North rooms
             
@@ -188,21 +199,11 @@ class aecFloor():
             if roomsNorth > 0:
                 xPnt = floorBox.NW.x
                 yPnt = floorBox.NW.y - roomsNorthSize
-                oRoom = aecPoint(xPnt, yPnt)
                 xRoom = abs(floorBox.NE.x - floorBox.NW.x)
                 yRoom = roomsNorthSize
                 if roomsNorth == 2: xRoom *= 0.5
-                points = self.__shaper.makeBox(origin = oRoom, 
-                                               xSize = xRoom, 
-                                               ySize = yRoom)                 
-                if not points: raise Exception
-                room = aecSpace()
-                room.boundary = points
-                northRooms = []
-                northRooms.append(room)
-                if roomsNorth == 2: 
-                    northRooms.append(self.__spacer.copy(room, x = xRoom))
-                    northRooms.reverse()
+                northRooms = self.__makeRooms(xPnt, yPnt, xRoom, yRoom, roomsNorth, x = xRoom)
+                northRooms.reverse()
                     
             # Create the South rooms    
                  
@@ -210,19 +211,10 @@ class aecFloor():
             if roomsSouth > 0:
                 xPnt = floorBox.SW.x
                 yPnt = floorBox.SW.y
-                oRoom = aecPoint(xPnt, yPnt)
                 xRoom = abs(floorBox.NE.x - floorBox.NW.x)
                 yRoom = roomsSouthSize
                 if roomsSouth == 2: xRoom *= 0.5
-                points = self.__shaper.makeBox(origin = oRoom, 
-                                               xSize = xRoom, 
-                                               ySize = yRoom)                 
-                if not points: raise Exception
-                room = aecSpace()
-                room.boundary = points
-                southRooms = []
-                southRooms.append(room)
-                if roomsSouth == 2: southRooms.append(self.__spacer.copy(room, x = xRoom))
+                southRooms = self.__makeRooms(xPnt, yPnt, xRoom, yRoom, roomsSouth, x = xRoom)
             
             # Create list of all rooms
             
@@ -235,16 +227,17 @@ class aecFloor():
             # Test all rooms for inclusion in floor boundary and corridor adjacency
             
             finalRooms = []
+            adjacent = self.__corridorAdjacent(testRooms)
             index = 0
             while index < len(testRooms):
-                if not self.__geometry.areAdjacent(testRooms[index].points_floor, 
-                                                   self.corridor.space.points_floor) or \
-                                                   testRooms[index].area < self.__minSpace:
-                   testRooms[(index + 1) % len(testRooms)].add(testRooms[index].points_floor)
+                if not adjacent[index] or testRooms[index].area < self.__minSpace:
+                   nxtIndex = (index + 1) % len(testRooms)
+                   testRooms[nxtIndex].add(testRooms[index].points_floor)
+                   adjacent[nxtIndex] = self.__corridorAdjacent([testRooms[nxtIndex]])[0]
                 index += 1
-            for room in testRooms:
-                if room.fitWithin(floor.points_floor) and \
-                self.__geometry.areAdjacent(room.points_floor, self.corridor.space.points_floor) and \
+            floorPoints = floor.points_floor
+            for room, isAdjacent in zip(testRooms, adjacent):
+                if room.fitWithin(floorPoints) and isAdjacent and \
                 room.area >= self.__minSpace:
                     finalRooms.append(room)            
             self.rooms.clear
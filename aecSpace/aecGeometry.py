@@ -1,11 +1,14 @@
 import math
 import numpy
+import threading
 import traceback
 
-from matplotlib.tri import Triangulation
+import shapely as shapelyArray
+from shapely import affinity as shapelyAffine
 from shapely import geometry as shapely
 from shapely import ops as shapeOps
-from typing import List, NamedTuple, Tuple
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Tuple
 
 from .aecPoint import aecPoint
 
@@ -84,6 +87,18 @@ class aecGeometry:
             ('normals', List[Tuple[float, float, float]])           
         ])
     
+    # Defines a mesh data structure listing vertices, triangle indices,
+    # and point normals as contiguous numpy arrays of shape (V, 3), (T, 3), and (V, 3).
+    
+    mesh3Darray = \
+        NamedTuple(
+        'mesh3Darray', 
+        [
+            ('vertices', numpy.ndarray),
+            ('indices', numpy.ndarray), 
+            ('normals', numpy.ndarray)           
+        ])
+    
     # Defines a mesh data structure listing vertices, triangle indices,
     # and point normals as sequences of floats.  
     
@@ -148,6 +163,16 @@ class aecGeometry:
             ('convex', bool)
         ])
                 
+    # Bounds the count of footprint triangulations kept by getTriangles, shared
+    # by every instance and keyed on coordinates relative to the first vertex,
+    # rounded to absorb the rounding error of translation.
+
+    triangle_cache_size = 1024
+
+    __triangles = OrderedDict()
+    __trianglesLock = threading.Lock()
+    __trianglesStats = {'hits': 0, 'misses': 0}
+
     def areAdjacent(self, shapeOne: List[aecPoint], shapeTwo: List[aecPoint]) -> bool:
         """
         Determines whether two shapes described by
@@ -178,6 +203,59 @@ class aecGeometry:
             traceback.print_exc()
             return None
     
+    def clearTriangleCache(self) -> bool:
+        """
+        Empties the footprint triangulation cache of getTriangles and resets its counters.
+        Returns True on success.
+        Returns False on failure.
+        """
+        try:
+            with self.__trianglesLock:
+                self.__triangles.clear()
+                self.__trianglesStats.update(hits = 0, misses = 0)
+            return True
+        except Exception:
+            traceback.print_exc()
+            return False
+
+    def getAdjacency(self, polygons: List[shapely.Polygon], tolerance: float = 0, 
+                     length: float = 0, tree: shapelyArray.STRtree = None) -> Dict[int, List[int]]:
+        """
+        Returns the adjacency graph of the delivered polygons as a dictionary
+        mapping the index of every polygon to the ascending indices of its neighbors.
+        Two polygons are adjacent if more than the delivered length of the boundary
+        of one lies within the tolerance of the boundary of the other, so with the
+        defaults only polygons sharing part of an edge are adjacent, while polygons
+        meeting at a point or nested with boundaries further apart than the tolerance
+        are not. If the length is None, polygons within the tolerance of each other
+        are adjacent, including those meeting at a point or nested.
+        Candidate pairs are found in one query of an STRtree of the polygons,
+        which may be delivered if already built, and measured together.
+        Returns None on failure.
+        """
+        try:
+            polygons = numpy.asarray(polygons, dtype = object)
+            if tree is None: tree = shapelyArray.STRtree(polygons)
+            one, two = tree.query(polygons, predicate = 'dwithin', distance = tolerance)
+            pairs = one < two
+            one, two = one[pairs], two[pairs]
+            if length is not None:
+                rings = shapelyArray.get_exterior_ring(polygons)
+                nearRings = rings
+                if tolerance > 0: nearRings = shapelyArray.buffer(rings, tolerance)
+                shared = shapelyArray.length(shapelyArray.intersection(rings[one], nearRings[two]))
+                pairs = shared > length
+                one, two = one[pairs], two[pairs]
+            graph = {index: [] for index in range(len(polygons))}
+            for index, neighbor in zip(one.tolist(), two.tolist()):
+                graph[index].append(neighbor)
+                graph[neighbor].append(index)
+            for neighbors in graph.values(): neighbors.sort()
+            return graph
+        except Exception:
+            traceback.print_exc()
+            return None
+
     def getAngles(self, vtxPoint: aecPoint, prvPoint: aecPoint, nxtPoint: aecPoint) -> vertexAngle:
         """
         Returns whether the delivered point is at a convex or concave angle between
@@ -334,6 +412,46 @@ class aecGeometry:
             traceback.print_exc() 
             return None        
 
+    def getErosion(self, boundary: shapely.Polygon, shape: shapely.Polygon, 
+                         point: Tuple[float, float]) -> shapely.base.BaseGeometry:
+        """
+        Returns the region of positions for the delivered reference point at which
+        the shape lies wholly within the interior of the boundary, computed as the 
+        Minkowski difference of the boundary and the shape. The region is the 
+        boundary, shifted by one shape vertex, less the sweep of the reflected 
+        shape along every boundary edge.
+        Concave shapes are swept as the triangles of their ear clipping.
+        Returns an empty geometry if the shape cannot fit.
+        Returns None on failure.
+        """
+        try:
+            shape = shapelyAffine.translate(shape, -point[0], -point[1])
+            hull = shape.convex_hull
+            if hull.area - shape.area <= hull.area * 1e-9: pieces = [hull]
+            else:
+                coords = shapelyArray.get_coordinates(shape.exterior)[:-1]
+                triangles = self.getTriangles(coords)
+                if triangles is None: pieces = [hull]
+                else: pieces = [shapely.Polygon(coords[tri]) for tri in triangles]
+            edges = []
+            for ring in [boundary.exterior] + list(boundary.interiors):
+                coords = numpy.asarray(ring.coords)[:, :2]
+                edges.append(numpy.stack((coords[:-1], coords[1:]), axis = 1))
+            edges = numpy.concatenate(edges)
+            sweeps = []
+            for piece in pieces:
+                vertices = numpy.asarray(piece.exterior.coords)[:-1, :2]
+                sweep = edges[:, :, numpy.newaxis, :] - vertices[numpy.newaxis, numpy.newaxis, :, :]
+                sweep = sweep.reshape(len(edges), -1, 2)
+                sweeps.append(shapelyArray.convex_hull(shapelyArray.multipoints(sweep)))
+            sweep = shapelyArray.union_all(numpy.concatenate(sweeps))
+            anchor = shape.exterior.coords[0]
+            region = shapelyAffine.translate(boundary, -anchor[0], -anchor[1])
+            return region.difference(sweep)
+        except Exception:
+            traceback.print_exc()
+            return None
+
     def getIntersect(self, boundary: List[aecPoint], shape: List[aecPoint]) -> List[aecPoint]:
         """
         Returns the points of a perimeter representing the 
@@ -357,9 +475,18 @@ class aecGeometry:
         """
         Constructs a compact 2D mesh representation of a horizontal 
         surface as a list of unique points and triangle indices.
+        Triangulates by ear clipping, falling back to a filtered Delaunay
+        triangulation if the points do not form a simple polygon.
+        The fallback imports matplotlib on first use and is unavailable
+        if matplotlib is not installed.
         Returns None on failure.
         """
         try:
+            triangles = self.getTriangles(numpy.array([point.xy for point in points]))
+            if triangles is not None:
+                return self.mesh2D(vertices = [pnt.xyz for pnt in points],
+                                   indices = [tuple(tri) for tri in triangles.tolist()])
+            from matplotlib.tri import Triangulation
             bndPoints= [point.xyz for point in points]
             boundary = shapely.polygon.orient(shapely.Polygon(bndPoints))
             xPoints = [point.x for point in points]
@@ -378,10 +505,170 @@ class aecGeometry:
                 tstPoint = triangle.representative_point()
                 if boundary.contains(tstPoint): 
                     indices.append(tuple([int(element) for element in list(item)]))
-            mesh = self.mesh2D
-            mesh.vertices = [pnt.xyz for pnt in points]
-            mesh.indices = indices
-            return mesh
+            return self.mesh2D(vertices = [pnt.xyz for pnt in points], indices = indices)
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    def getMeshArrays(self, coords: numpy.ndarray, level: float = 0, height: float = 0,
+                      dtype = numpy.float32) -> mesh3Darray:
+        """
+        Constructs the mesh of a prism extruded from an (N, 2) array of anticlockwise
+        boundary coordinates, filling buffers allocated once for the 2N cap vertices
+        and 4N side vertices in the order ceiling, floor, and sides.
+        Vertices and normals are returned as dtype and indices as uint32.
+        Returns None on failure.
+        """
+        try:
+            coords = numpy.asarray(coords, dtype = numpy.float64)[:, :2]
+            count = len(coords)
+            triangles = self.getTriangles(coords)
+            if triangles is None:
+                triangles = self.getMesh2D([aecPoint(x, y) for x, y in coords.tolist()]).indices
+                triangles = numpy.array(triangles, dtype = numpy.int64).reshape(-1, 3)
+            capCount = len(triangles)
+            vertices = numpy.empty((6 * count, 3), dtype = dtype)
+            normals = numpy.zeros((6 * count, 3), dtype = dtype)
+            indices = numpy.empty((2 * capCount + 2 * count, 3), dtype = numpy.uint32)
+            ceiling = level + height
+            vertices[:count, :2] = coords
+            vertices[:count, 2] = ceiling
+            vertices[count:2 * count, :2] = coords
+            vertices[count:2 * count, 2] = level
+            normals[:count, 2] = 1
+            normals[count:2 * count, 2] = -1
+            indices[:capCount] = triangles
+            indices[capCount:2 * capCount] = triangles[:, ::-1] + count
+            nxtCoords = numpy.roll(coords, -1, axis = 0)
+            sides = vertices[2 * count:].reshape(count, 4, 3)
+            sides[:, 0, :2] = coords
+            sides[:, 1, :2] = nxtCoords
+            sides[:, 2, :2] = nxtCoords
+            sides[:, 3, :2] = coords
+            sides[:, :2, 2] = level
+            sides[:, 2:, 2] = ceiling
+            delta = nxtCoords - coords
+            length = numpy.hypot(delta[:, 0], delta[:, 1])
+            sideNormals = normals[2 * count:].reshape(count, 4, 3)
+            sideNormals[:, :, 0] = (-delta[:, 1] / length)[:, numpy.newaxis]
+            sideNormals[:, :, 1] = (delta[:, 0] / length)[:, numpy.newaxis]
+            quads = (2 * count + 4 * numpy.arange(count, dtype = numpy.uint32))[:, numpy.newaxis]
+            indices[2 * capCount::2] = quads + numpy.array([0, 1, 2], dtype = numpy.uint32)
+            indices[2 * capCount + 1::2] = quads + numpy.array([2, 3, 0], dtype = numpy.uint32)
+            return self.mesh3Darray(vertices = vertices, indices = indices, normals = normals)
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    def getTriangleCacheInfo(self) -> dict:
+        """
+        Returns the hits, misses, current size, and maximum size 
+        of the footprint triangulation cache of getTriangles.
+        Returns None on failure.
+        """
+        try:
+            with self.__trianglesLock:
+                return dict(self.__trianglesStats, 
+                            size = len(self.__triangles), 
+                            maxsize = self.triangle_cache_size)
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    def getTriangles(self, coords: numpy.ndarray) -> numpy.ndarray:
+        """
+        Triangulates the simple polygon described by an (N, 2) array of coordinates
+        by ear clipping, returning a read-only (N - 2, 3) array of anticlockwise 
+        vertex indices.
+        Triangulations are kept in a least recently used cache keyed on the
+        coordinates relative to the first vertex as fractions of the largest
+        extent of the polygon rounded to twelve decimal places, so translated
+        and scaled copies of a footprint, such as stacked floors or rows of rooms,
+        are clipped once while footprints differing by more than a trillionth of
+        their size are not confused. Failed triangulations are not cached.
+        Returns None if the polygon cannot be triangulated or on failure.
+        """
+        try:
+            coords = numpy.asarray(coords, dtype = numpy.float64)[:, :2]
+            key = None
+            if len(coords): 
+                relative = coords - coords[0]
+                extent = numpy.abs(relative).max()
+                if extent > 0: key = (len(coords), (numpy.round(relative / extent, 12) + 0.0).tobytes())
+            if key is None: return self.__clipEars(coords)
+            with self.__trianglesLock:
+                if key in self.__triangles:
+                    self.__triangles.move_to_end(key)
+                    self.__trianglesStats['hits'] += 1
+                    return self.__triangles[key]
+                self.__trianglesStats['misses'] += 1
+            triangles = self.__clipEars(coords)
+            if triangles is None: return None
+            triangles.flags.writeable = False
+            with self.__trianglesLock:
+                self.__triangles[key] = triangles
+                while len(self.__triangles) > max(0, self.triangle_cache_size): 
+                    self.__triangles.popitem(last = False)
+            return triangles
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    def __clipEars(self, coords: numpy.ndarray) -> numpy.ndarray:
+        """
+        Triangulates the simple polygon described by an (N, 2) array of coordinates
+        by ear clipping, returning an (N - 2, 3) array of anticlockwise vertex indices.
+        Each pass tests every convex vertex against every reflex vertex at once
+        and clips all non-adjacent ears found.
+        Returns None if the polygon cannot be triangulated.
+        """
+        try:
+            if len(coords) > 3 and numpy.array_equal(coords[0], coords[-1]): coords = coords[:-1]
+            if len(coords) < 3: return None
+            xCoords = coords[:, 0]
+            yCoords = coords[:, 1]
+            area = numpy.dot(xCoords, numpy.roll(yCoords, -1)) - numpy.dot(numpy.roll(xCoords, -1), yCoords)
+            if area == 0: return None
+            remaining = numpy.arange(len(coords))
+            if area < 0: remaining = remaining[::-1]
+            triangles = []
+
+            def cross(one, two):
+                return (one[..., 0] * two[..., 1]) - (one[..., 1] * two[..., 0])
+
+            while len(remaining) > 3:
+                count = len(remaining)
+                pnts = coords[remaining]
+                prvPnts = numpy.roll(pnts, 1, axis = 0)
+                nxtPnts = numpy.roll(pnts, -1, axis = 0)
+                turns = cross(pnts - prvPnts, nxtPnts - pnts)
+                convex = numpy.flatnonzero(turns > 0)
+                reflex = numpy.flatnonzero(turns <= 0)
+                if convex.size == 0: return None
+                if reflex.size == 0: ears = convex
+                else:
+                    tstPnts = pnts[reflex][numpy.newaxis, :, :]
+                    prvEar = prvPnts[convex][:, numpy.newaxis, :]
+                    vtxEar = pnts[convex][:, numpy.newaxis, :]
+                    nxtEar = nxtPnts[convex][:, numpy.newaxis, :]
+                    inside = (cross(vtxEar - prvEar, tstPnts - prvEar) >= 0) & \
+                             (cross(nxtEar - vtxEar, tstPnts - vtxEar) >= 0) & \
+                             (cross(prvEar - nxtEar, tstPnts - nxtEar) >= 0)
+                    corner = numpy.all(tstPnts == prvEar, axis = 2) | \
+                             numpy.all(tstPnts == nxtEar, axis = 2)
+                    ears = convex[~numpy.any(inside & ~corner, axis = 1)]
+                if ears.size == 0: return None
+                clipped = numpy.zeros(count, dtype = bool)
+                for ear in ears.tolist():
+                    if count - clipped.sum() <= 3: break
+                    if clipped[(ear - 1) % count] or clipped[(ear + 1) % count]: continue
+                    clipped[ear] = True
+                    triangles.append((remaining[(ear - 1) % count], 
+                                      remaining[ear], 
+                                      remaining[(ear + 1) % count]))
+                remaining = remaining[~clipped]
+            triangles.append(tuple(remaining))
+            return numpy.array(triangles, dtype = numpy.int64)
         except Exception:
             traceback.print_exc()
             return None
@@ -400,6 +687,34 @@ class aecGeometry:
             traceback.print_exc()
             return None              
     
+    def getNeighbors(self, polygon: shapely.Polygon, polygons: List[shapely.Polygon], 
+                     tolerance: float = 0, length: float = None, 
+                     tree: shapelyArray.STRtree = None) -> List[int]:
+        """
+        Returns the ascending indices of the delivered polygons adjacent to one
+        polygon, by the measure of getAdjacency, from a single query of the
+        polygon against an STRtree of the polygons, which may be delivered if
+        already built, without building the graph of the polygons themselves.
+        With the default length of None every polygon within the tolerance of
+        the polygon is adjacent, including those meeting it at a point, those
+        containing it and those within it.
+        A polygon delivered among the polygons is its own neighbor.
+        Returns None on failure.
+        """
+        try:
+            polygons = numpy.asarray(polygons, dtype = object)
+            if tree is None: tree = shapelyArray.STRtree(polygons)
+            candidates = numpy.sort(tree.query(polygon, predicate = 'dwithin', distance = tolerance))
+            if length is None: return candidates.tolist()
+            nearRing = shapelyArray.get_exterior_ring(polygon)
+            if tolerance > 0: nearRing = shapelyArray.buffer(nearRing, tolerance)
+            rings = shapelyArray.get_exterior_ring(polygons[candidates])
+            shared = shapelyArray.length(shapelyArray.intersection(rings, nearRing))
+            return candidates[shared > length].tolist()
+        except Exception:
+            traceback.print_exc()
+            return None
+
     def getNormal(self, point: aecPoint, prePoint: aecPoint, nxtPoint: aecPoint) -> Tuple[float, float, float]:
         """
         Returns the normal from three anticlockwise points.
@@ -434,6 +749,21 @@ class aecGeometry:
             traceback.print_exc()
             return None          
             
+    def isConvexArray(self, coords: numpy.ndarray) -> bool:
+        """
+        Determines from an anticlockwise (N, 2) array of coordinates
+        whether the implied polygon is convex.
+        Returns None on failure.
+        """
+        try:
+            edges = numpy.roll(coords, -1, axis = 0) - coords
+            nxtEdges = numpy.roll(edges, -1, axis = 0)
+            cross = (edges[:, 0] * nxtEdges[:, 1]) - (edges[:, 1] * nxtEdges[:, 0])
+            return bool(numpy.all(cross >= 0))
+        except Exception:
+            traceback.print_exc()
+            return None          
+            
     def mirrorPoints2D (self, points: List[aecPoint], mPoint1: aecPoint, mPoint2: aecPoint) -> List[aecPoint]:
         """
         Accepts a set of points and a mirror axis defined by two 2D points
@@ -478,6 +808,22 @@ class aecGeometry:
             traceback.print_exc()
             return None
     
+    def orientArray(self, coords: numpy.ndarray) -> numpy.ndarray:
+        """
+        Returns an (N, 2) array of polygon coordinates in anticlockwise order,
+        reversing clockwise coordinates about the first point as shapely's orient does.
+        Returns None on failure.
+        """
+        try:
+            xCoords = coords[:, 0]
+            yCoords = coords[:, 1]
+            area = numpy.dot(xCoords, numpy.roll(yCoords, -1)) - numpy.dot(numpy.roll(xCoords, -1), yCoords)
+            if area >= 0: return coords
+            return numpy.roll(coords[::-1], 1, axis = 0)
+        except Exception:
+            traceback.print_exc()
+            return None
+
     def rmvColinear(self, points: List[aecPoint]) -> List[aecPoint]:
         """
         Returns the delivered list of points with redundundant colinear points removed.
@@ -500,6 +846,30 @@ class aecGeometry:
             traceback.print_exc()
             return None
            
+    def rmvColinearArray(self, coords: numpy.ndarray) -> numpy.ndarray:
+        """
+        Returns an (N, 2) float64 array of the delivered polygon coordinates with
+        any closing point, repeated points, and redundant colinear points removed.
+        Returns None on failure.
+        """
+        try:
+            coords = numpy.asarray(coords, dtype = numpy.float64)[:, :2]
+            while len(coords) > 1:
+                same = numpy.all(coords == numpy.roll(coords, -1, axis = 0), axis = 1)
+                if not same.any(): break
+                coords = coords[~same]
+            while len(coords) > 2:
+                edges = numpy.roll(coords, -1, axis = 0) - coords
+                prvEdges = numpy.roll(edges, 1, axis = 0)
+                cross = (prvEdges[:, 0] * edges[:, 1]) - (prvEdges[:, 1] * edges[:, 0])
+                colinear = cross == 0
+                if not colinear.any(): break
+                coords = coords[~colinear]
+            return coords
+        except Exception:
+            traceback.print_exc()
+            return None
+           
     def toDegrees(self, radians: float = 0):
         """
         Returns a conversion of radians to degrees.
@@ -17,7 +17,7 @@ class aecPoint():
         """
         Constructor defaults to origin point coordinates.
         """
-        self.__ID = str(uuid4())
+        self.__ID = None
         self.__x = float(x)
         self.__y = float(y)
         self.__z = float(z)
@@ -26,9 +26,10 @@ class aecPoint():
     def ID(self) -> str:
         """
         Property
-        Returns the UUID.
+        Returns the UUID, generated on first request.
         """            
         try:
+            if not self.__ID: self.__ID = str(uuid4())
             return self.__ID
         except Exception:
             traceback.print_exc()
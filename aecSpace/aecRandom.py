@@ -0,0 +1,75 @@
+import numpy
+import random
+import traceback
+
+class aecRandom:
+    """
+    Wraps a source of random numbers so placement functions can accept a seed,
+    a random.Random instance, or a numpy Generator interchangeably.
+    Without a source, draws from the shared state of the random module.
+    """
+
+    __slots__ = ['__source']
+
+    def __init__(self, source = None):
+        """
+        Constructor accepts None, an integer or string seed, a random.Random
+        instance, a numpy Generator, or another aecRandom.
+        """
+        if isinstance(source, aecRandom): source = source.source
+        if isinstance(source, numpy.integer): source = int(source)
+        if source is None: source = random
+        elif isinstance(source, (int, str, bytes)): source = random.Random(source)
+        self.__source = source
+
+    @property
+    def source(self):
+        """
+        Property
+        Returns the wrapped random.Random, numpy Generator, or random module.
+        """
+        try:
+            return self.__source
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    def randint(self, low: int, high: int) -> int:
+        """
+        Returns a random integer from low to high inclusive.
+        Returns None on failure.
+        """
+        try:
+            if isinstance(self.__source, numpy.random.Generator):
+                return int(self.__source.integers(low, high + 1))
+            return self.__source.randint(low, high)
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    def uniform(self, low: float, high: float) -> float:
+        """
+        Returns a random float from low to high.
+        Returns None on failure.
+        """
+        try:
+            return float(self.__source.uniform(low, high))
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    def uniformArray(self, low: float, high: float, size: int) -> numpy.ndarray:
+        """
+        Returns a numpy array of size random floats from low to high.
+        A random module or random.Random source seeds a numpy Generator
+        with a single draw, so the array remains reproducible from the seed.
+        Returns None on failure.
+        """
+        try:
+            source = self.__source
+            if not isinstance(source, numpy.random.Generator):
+                source = numpy.random.default_rng(source.getrandbits(64))
+            return source.uniform(low, high, size)
+        except Exception:
+            traceback.print_exc()
+            return None
@@ -0,0 +1,351 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+
+"""
+aecResultCache stores JSON results on disk in a SQLite
+database keyed on strings, such as hashes of the inputs
+that produced each result.
+"""
+
+class aecResultCache:
+    """
+    Keeps results up to a total size in bytes, evicting the least recently
+    used results first. Counts hits and misses both for this instance and
+    across every process sharing the database file.
+    Connections are opened per process and thread on first use, so one
+    instance may be shared by threads and inherited by worker processes.
+    Reads take no write lock: access times and shared counts of reads are
+    held in memory and written in batches by put, flush, and stats, or by a
+    later read if the database is not locked at the time, so until written
+    they are lost if the process exits and do not affect eviction.
+    """
+
+    __slots__ = \
+    [
+        '__hits',
+        '__local',
+        '__lock',
+        '__maxSize',
+        '__misses',
+        '__path',
+        '__pending',
+    ]
+
+    __flushCount = 64
+    __flushSeconds = 1.0
+    __timeout = 30
+
+    __schema = \
+    """
+    CREATE TABLE IF NOT EXISTS results
+        (key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, accessed INTEGER NOT NULL);
+    CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed);
+    CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+    INSERT OR IGNORE INTO counters VALUES ('hits', 0), ('misses', 0);
+    """
+
+    def __init__(self, path: str, maxSize: int = 256 * 1024 * 1024):
+        """
+        Constructor accepts the path of the database file, created
+        if absent, and the maximum total size of results in bytes.
+        """
+        self.__hits = 0
+        self.__local = threading.local()
+        self.__lock = threading.Lock()
+        self.__maxSize = max(0, int(maxSize))
+        self.__misses = 0
+        self.__path = os.path.abspath(path)
+        self.__pending = self.__newPending()
+
+    def __connect(self) -> sqlite3.Connection:
+        """
+        Returns the connection of the current process and thread,
+        opening it and creating the tables on first use.
+        """
+        local = self.__local
+        if getattr(local, 'pid', None) != os.getpid():
+            folder = os.path.dirname(self.__path)
+            if folder: os.makedirs(folder, exist_ok = True)
+            connection = sqlite3.connect(self.__path, timeout = self.__timeout, isolation_level = None)
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.executescript(self.__schema)
+            local.connection = connection
+            local.pid = os.getpid()
+        return local.connection
+
+    def __count(self, name: str, key: str = None):
+        """
+        Increments a counter of this instance and holds the increment of the
+        shared counter, with the access time of any result found, for writing.
+        """
+        with self.__lock:
+            if name == 'hits': self.__hits += 1
+            else: self.__misses += 1
+            pending = self.__pending
+            if pending['pid'] != os.getpid(): pending = self.__pending = self.__newPending()
+            pending[name] += 1
+            if key is not None: pending['accessed'][key] = time.time_ns()
+
+    def __flush(self, connection: sqlite3.Connection, wait: bool = True) -> bool:
+        """
+        Writes the held access times and counts in their own transaction.
+        Unless told to wait, gives up at once if another connection holds the
+        write lock, keeping the held values for a later attempt.
+        Returns True if nothing remains held.
+        """
+        pending = self.__takePending()
+        if not (pending['accessed'] or pending['hits'] or pending['misses']): return True
+        if not wait: connection.execute('PRAGMA busy_timeout = 0')
+        try:
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                self.__writePending(connection, pending)
+                connection.execute('COMMIT')
+            except Exception:
+                connection.execute('ROLLBACK')
+                raise
+            return True
+        except sqlite3.OperationalError:
+            self.__restorePending(pending)
+            if wait: raise
+            return False
+        finally:
+            if not wait: connection.execute('PRAGMA busy_timeout = %d' % (self.__timeout * 1000))
+
+    def __flushDue(self) -> bool:
+        """
+        Returns True if enough reads are held or held long enough to write.
+        """
+        with self.__lock:
+            pending = self.__pending
+            return len(pending['accessed']) + pending['hits'] + pending['misses'] >= self.__flushCount or \
+                   time.monotonic() - pending['since'] >= self.__flushSeconds
+
+    def __newPending(self) -> dict:
+        """
+        Returns empty held access times and counts for the current process.
+        """
+        return {'pid': os.getpid(), 'since': time.monotonic(), 'accessed': {}, 'hits': 0, 'misses': 0}
+
+    def __restorePending(self, pending: dict):
+        """
+        Returns taken access times and counts that could not be written to those held.
+        """
+        with self.__lock:
+            current = self.__pending
+            if current['pid'] != pending['pid']: return
+            for key, accessed in pending['accessed'].items():
+                current['accessed'][key] = max(accessed, current['accessed'].get(key, 0))
+            current['hits'] += pending['hits']
+            current['misses'] += pending['misses']
+
+    def __takePending(self) -> dict:
+        """
+        Returns the held access times and counts of this process, holding none.
+        """
+        with self.__lock:
+            pending = self.__pending
+            self.__pending = self.__newPending()
+            if pending['pid'] != os.getpid(): return self.__newPending()
+            return pending
+
+    def __writePending(self, connection: sqlite3.Connection, pending: dict):
+        """
+        Writes taken access times and counts within the current transaction.
+        """
+        connection.executemany('UPDATE results SET accessed = MAX(accessed, ?) WHERE key = ?',
+                               [(accessed, key) for key, accessed in pending['accessed'].items()])
+        connection.executemany('UPDATE counters SET value = value + ? WHERE name = ?',
+                               [(pending['hits'], 'hits'), (pending['misses'], 'misses')])
+
+    @property
+    def count(self) -> int:
+        """
+        Property
+        Returns the count of stored results.
+        Returns None on failure.
+        """
+        try:
+            return self.__connect().execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    @property
+    def hits(self) -> int:
+        """
+        Property
+        Returns the count of results found by this instance.
+        Returns None on failure.
+        """
+        try:
+            return self.__hits
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    @property
+    def max_size(self) -> int:
+        """
+        Property
+        Returns the maximum total size of stored results in bytes.
+        Returns None on failure.
+        """
+        try:
+            return self.__maxSize
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    @property
+    def misses(self) -> int:
+        """
+        Property
+        Returns the count of results not found by this instance.
+        Returns None on failure.
+        """
+        try:
+            return self.__misses
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    @property
+    def path(self) -> str:
+        """
+        Property
+        Returns the absolute path of the database file.
+        Returns None on failure.
+        """
+        try:
+            return self.__path
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    @property
+    def size(self) -> int:
+        """
+        Property
+        Returns the total size of stored results in bytes.
+        Returns None on failure.
+        """
+        try:
+            return self.__connect().execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    @property
+    def stats(self) -> dict:
+        """
+        Property
+        Returns the hits and misses of every process sharing the database file
+        with the count and total size of stored results.
+        Returns None on failure.
+        """
+        try:
+            connection = self.__connect()
+            self.__flush(connection)
+            stats = dict(connection.execute('SELECT name, value FROM counters').fetchall())
+            stats['count'], stats['size'] = \
+                connection.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results').fetchone()
+            return stats
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    def clear(self) -> bool:
+        """
+        Deletes every stored result and resets all counters.
+        Returns True on success.
+        Returns False on failure.
+        """
+        try:
+            connection = self.__connect()
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute('DELETE FROM results')
+            connection.execute('UPDATE counters SET value = 0')
+            connection.execute('COMMIT')
+            self.__takePending()
+            with self.__lock:
+                self.__hits = 0
+                self.__misses = 0
+            return True
+        except Exception:
+            traceback.print_exc()
+            return False
+
+    def flush(self) -> bool:
+        """
+        Writes the access times and shared counts of reads held in memory,
+        waiting for the write lock if another connection holds it.
+        Returns True on success.
+        Returns False on failure.
+        """
+        try:
+            return self.__flush(self.__connect())
+        except Exception:
+            traceback.print_exc()
+            return False
+
+    def get(self, key: str):
+        """
+        Returns the result stored under the key as a new object,
+        marking it as the most recently used result.
+        Reads without taking the write lock.
+        Returns None if no result is stored under the key or on failure.
+        """
+        try:
+            connection = self.__connect()
+            row = connection.execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+            if row is None: self.__count('misses')
+            else: self.__count('hits', key)
+            if self.__flushDue(): self.__flush(connection, wait = False)
+            if row is None: return None
+            return json.loads(row[0])
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    def put(self, key: str, value) -> bool:
+        """
+        Stores a JSON serializable result under the key with the held access
+        times and counts of reads, then evicts the least recently used results
+        until the total size is within the maximum.
+        A result larger than the maximum is not stored.
+        Returns True on success.
+        Returns False on failure.
+        """
+        try:
+            value = json.dumps(value, separators = (',', ':'))
+            size = len(value.encode('utf-8'))
+            if size > self.__maxSize: return False
+            connection = self.__connect()
+            connection.execute('BEGIN IMMEDIATE')
+            pending = self.__takePending()
+            try:
+                self.__writePending(connection, pending)
+                connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)',
+                                   (key, value, size, time.time_ns()))
+                total = connection.execute('SELECT SUM(size) FROM results').fetchone()[0]
+                cursor = connection.execute('SELECT key, size FROM results ORDER BY accessed')
+                evicted = []
+                for oldKey, oldSize in cursor:
+                    if total <= self.__maxSize: break
+                    evicted.append((oldKey,))
+                    total -= oldSize
+                connection.executemany('DELETE FROM results WHERE key = ?', evicted)
+                connection.execute('COMMIT')
+            except Exception:
+                connection.execute('ROLLBACK')
+                self.__restorePending(pending)
+                raise
+            return True
+        except Exception:
+            traceback.print_exc()
+            return False
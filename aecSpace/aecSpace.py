@@ -1,16 +1,19 @@
+import numpy
 import traceback
 
-from random import uniform
-from typing import List, Tuple
+from typing import List, NamedTuple, Tuple
 from uuid import uuid4
 
+import shapely as shapelyArray
 from shapely import geometry as shapely
 from shapely import affinity as shapelyAffine
 from shapely import ops as shapelyOps
+from shapely import prepared as shapelyPrepared
 
 from .aecColor import aecColor
 from .aecGeometry import aecGeometry
 from .aecPoint import aecPoint
+from .aecRandom import aecRandom
 from .aecValid import aecValid
 
 class aecSpace:
@@ -27,64 +30,126 @@ class aecSpace:
       to the ground plane with only vertical boundaries.
 
     * Curved boundaries must be represented as a series of straight segments.
+
+    * Derived values such as centroids, normals, and meshes are cached until
+      the boundary, level, or height changes. Points are built on request and
+      lists are returned as copies, so callers may modify what they receive.
     """
     __aecGeometry = aecGeometry()
     __aecValid = aecValid()
+
+    # The default 1 x 1 square boundary, shared by new spaces until their boundary changes.
+
+    __unitCoords = numpy.array([[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0]])
+    __unitCoords.flags.writeable = False
+    __unitSquare = shapely.Polygon(__unitCoords)
     
     __slots__ = \
     [
          '__address',
          '__boundary',         
+         '__cache',
          '__color',           
          '__convex',
+         '__coords',
          '__height',
          '__ID',
          '__level',
          '__name',
-         '__points_floor',
+         '__prepared',
+         '__version',
+         '__watchers',
     ]   
 
     def __init__(self, points: List[aecPoint] = None):
         """
         Constructor defaults to a 1 x 1 square with an origin at (0, 0, 0).
         """
+        self.__setDefaults()
+        if not points: 
+            self.__setCoords(self.__unitCoords, self.__unitSquare, True)
+            return
+        self.__setBoundary(points)
+
+    def __setDefaults(self):
+        """
+        Sets every attribute except the boundary to its default value.
+        """
         self.__address = (0, 0, 0)
         self.__boundary = None
+        self.__cache = {}
         self.__color = aecColor()
+        self.__convex = None
+        self.__coords = None
         self.__height = 1.0
-        self.__ID = str(uuid4())
+        self.__ID = None
         self.__level = 0.0
         self.__name = ''
-        self.__points_floor = None
-        if not points:
-            points = \
-            [
-                aecPoint(0, 0), 
-                aecPoint(1, 0), 
-                aecPoint(1, 1), 
-                aecPoint(0, 1)
-            ]
-        self.__setBoundary(points)
+        self.__prepared = None
+        self.__version = 0
+        self.__watchers = None
 
     def __setBoundary(self, points: List[aecPoint]) -> bool:
         """
         Creates a boundary from a set of anticlockwise points.
         """
         try:
-            prePoints = self.__points_floor
             points = self.__aecGeometry.rmvColinear(points)
             if len(points) < 3: raise ValueError('Need at least three non-colinear points')                
             polygon = shapely.polygon.orient(shapely.Polygon([point.xy for point in points]))
             if type(polygon) != shapely.polygon.Polygon: raise Exception
-            self.__points_floor = [aecPoint(pnt[0], pnt[1]) for pnt in polygon.exterior.coords[:-1]] 
+            return self.__setCoords(shapelyArray.get_coordinates(polygon)[:-1], polygon)
+        except Exception:
+            traceback.print_exc() 
+            return False                 
+
+    def __setCoords(self, coords: numpy.ndarray, polygon: shapely.Polygon = None, 
+                    convex: bool = None) -> bool:
+        """
+        Sets the boundary from an anticlockwise (N, 2) array of coordinates
+        free of colinear points, such as a transformation of the current boundary.
+        A read-only float64 array is kept without copying.
+        """
+        try:
+            if not isinstance(coords, numpy.ndarray) or \
+               coords.dtype != numpy.float64 or coords.flags.writeable:
+                coords = numpy.array(coords, dtype = numpy.float64)
+                coords.flags.writeable = False
+            if polygon is None: polygon = shapely.Polygon(coords)
+            if convex is None: convex = self.__aecGeometry.isConvexArray(coords)
+            self.__coords = coords
             self.__boundary = polygon
-            self.__convex = self.__aecGeometry.isConvex(points)
+            self.__prepared = None
+            self.__convex = convex
+            self.__invalidate()
             return True
         except Exception:
-            self.__points_floor = prePoints
             traceback.print_exc() 
             return False                 
 
+    def __copyMesh(self, mesh: NamedTuple) -> NamedTuple:
+        """
+        Returns a copy of a cached mesh with new lists of its immutable items.
+        """
+        return type(mesh)._make(list(items) for items in mesh)
+
+    def __invalidate(self):
+        """
+        Advances the version, discards all cached derived values,
+        and marks every watching flag stale.
+        """
+        self.__version += 1
+        self.__cache.clear()
+        if self.__watchers:
+            for flag in self.__watchers: flag['stale'] = True
+            self.__watchers = None
+
+    def __meshArrays(self, dtype) -> aecGeometry.mesh3Darray:
+        """
+        Builds the array mesh of the space in the requested float precision.
+        """
+        return self.__aecGeometry.getMeshArrays(self.__coords, self.__level, self.__height, dtype)
+
     @property
     def address(self) -> Tuple[int, int, int]:
         """
@@ -121,7 +186,8 @@ class aecSpace:
         Returns None on failure.
         """
         try:
-            return self.boundary.area
+            if 'area' not in self.__cache: self.__cache['area'] = self.__boundary.area
+            return self.__cache['area']
         except:
             traceback.print_exc() 
             return None        
@@ -171,8 +237,9 @@ class aecSpace:
         """
         try:
             box = self.points_box
-            return [self.__aecGeometry.getMidpoint(box.SW, box.NW),
+            axis = [self.__aecGeometry.getMidpoint(box.SW, box.NW),
                     self.__aecGeometry.getMidpoint(box.SE, box.NE)]
+            return axis
         except:
             traceback.print_exc() 
             return None 
@@ -186,8 +253,9 @@ class aecSpace:
         """
         try:
             box = self.points_box
-            return [self.__aecGeometry.getMidpoint(box.SW, box.SE),
+            axis = [self.__aecGeometry.getMidpoint(box.SW, box.SE),
                     self.__aecGeometry.getMidpoint(box.NW, box.NE)]
+            return axis
         except:
             traceback.print_exc() 
             return None              
@@ -216,6 +284,22 @@ class aecSpace:
         except Exception:
             traceback.print_exc() 
     
+    @property
+    def boundary_prepared(self) -> shapelyPrepared.PreparedGeometry:
+        """
+        Property
+        Returns a prepared version of the boundary polygon for repeated
+        containment and intersection tests, built on first use and
+        discarded whenever the boundary changes.
+        Returns None on failure.
+        """
+        try:
+            if not self.__prepared: self.__prepared = shapelyPrepared.prep(self.__boundary)
+            return self.__prepared
+        except:
+            traceback.print_exc() 
+            return None
+
     @property
     def box(self) -> shapely.Polygon:
         """
@@ -246,8 +330,7 @@ class aecSpace:
         """
         try:
             point = self.center_floor
-            point.z = self.elevation
-            return point
+            return aecPoint(point.x, point.y, self.elevation)
         except:
             traceback.print_exc() 
             return None 
@@ -260,10 +343,8 @@ class aecSpace:
         Returns None on failure.
         """
         try:
-            box_pnts = self.points_box
-            point = self.__aecGeometry.getMidpoint(box_pnts.SW, box_pnts.NE)
-            point.z = self.level
-            return point
+            bounds = self.__boundary.bounds
+            return aecPoint((bounds[0] + bounds[2]) * 0.5, (bounds[1] + bounds[3]) * 0.5, self.level)
         except:
             traceback.print_exc() 
             return None 
@@ -277,8 +358,7 @@ class aecSpace:
         """
         try:
             flrCenter = self.center_floor
-            flrCenter.z = self.level + (self.height * 0.5)
-            return flrCenter
+            return aecPoint(flrCenter.x, flrCenter.y, self.level + (self.height * 0.5))
         except Exception:
             traceback.print_exc() 
             return None     
@@ -305,8 +385,11 @@ class aecSpace:
         Returns None on failure.
         """
         try:
-            centroid = self.__boundary.centroid    
-            return aecPoint(centroid.x, centroid.y, self.level)
+            if 'centroid_floor' not in self.__cache: 
+                centroid = self.__boundary.centroid
+                self.__cache['centroid_floor'] = (centroid.x, centroid.y)
+            xCoord, yCoord = self.__cache['centroid_floor']
+            return aecPoint(xCoord, yCoord, self.level)
         except:
             traceback.print_exc() 
             return None 
@@ -386,6 +469,19 @@ class aecSpace:
         except Exception:
             traceback.print_exc()
             
+    @property
+    def coords_floor(self) -> numpy.ndarray:
+        """
+        Property
+        Returns the anticlockwise floor boundary as a read-only (N, 2) array of x and y coordinates.
+        Returns None on failure.
+        """
+        try:
+            return self.__coords
+        except Exception:
+            traceback.print_exc() 
+            return None
+
     @property
     def copy_properties(self) -> dict:
         """
@@ -454,6 +550,7 @@ class aecSpace:
         try:
             preVal = self.__height
             self.__height = float(value)
+            self.__invalidate()
         except Exception:
             self.__height = preVal
             traceback.print_exc()   
@@ -462,9 +559,10 @@ class aecSpace:
     def ID(self) -> str:
         """
         Property
-        Returns the UUID.
+        Returns the UUID, generated on first request.
         """            
         try:
+            if not self.__ID: self.__ID = str(uuid4())
             return self.__ID
         except Exception:
             traceback.print_exc()
@@ -492,6 +590,7 @@ class aecSpace:
         try:
             preVal = self.__level
             self.__level = float(value)
+            self.__invalidate()
         except:
             self.__level = preVal
             traceback.print_exc() 
@@ -504,24 +603,32 @@ class aecSpace:
         Returns None on failure.
         """
         try:
-            ceiling_mesh = self.mesh_ceiling
-            vertices = ceiling_mesh.vertices
-            indices = ceiling_mesh.indices     
-            normals = ceiling_mesh.normals
-            off = len(vertices)
-            floor_mesh = self.mesh_floor
-            vertices += floor_mesh.vertices
-            indices += [(idx[2] + off,idx[1] + off, idx[0] + off) for idx in floor_mesh.indices] 
-            normals += floor_mesh.normals
-            side_meshes = self.mesh_sides
-            for side in side_meshes:
-                off = len(vertices)
-                vertices += side.vertices
-                normals += side.normals
-                indices += [(idx[0] + off,idx[1] + off, idx[2] + off) for idx in side.indices] 
-            return aecGeometry.mesh3D(vertices = vertices, 
-                                      indices = indices, 
-                                      normals = normals)                      
+            if 'mesh' in self.__cache: return self.__copyMesh(self.__cache['mesh'])
+            arrays = self.__meshArrays(numpy.float64)
+            mesh = aecGeometry.mesh3D(vertices = [tuple(item) for item in arrays.vertices.tolist()], 
+                                      indices = [tuple(item) for item in arrays.indices.tolist()], 
+                                      normals = [tuple(item) for item in arrays.normals.tolist()])                      
+            self.__cache['mesh'] = mesh
+            return self.__copyMesh(mesh)
+        except Exception:
+            traceback.print_exc() 
+            return None  
+
+    @property
+    def mesh_arrays(self) -> aecGeometry.mesh3Darray:
+        """
+        Property
+        Returns a mesh of the space as contiguous float32 vertex and normal
+        arrays and a uint32 index array, ready for upload to a glTF buffer.
+        The arrays are cached and read-only.
+        Returns None on failure.
+        """
+        try:
+            if 'mesh_arrays' in self.__cache: return self.__cache['mesh_arrays']
+            mesh = self.__meshArrays(numpy.float32)
+            for array in mesh: array.flags.writeable = False
+            self.__cache['mesh_arrays'] = mesh
+            return mesh
         except Exception:
             traceback.print_exc() 
             return None  
@@ -534,13 +641,16 @@ class aecSpace:
         Returns None on failure.
         """
         try:
+            if 'mesh_ceiling' in self.__cache: return self.__copyMesh(self.__cache['mesh_ceiling'])
             mesh2D = self.__aecGeometry.getMesh2D(self.points_ceiling)
             normal = self.normal_ceiling
             normals = []
             for vertex in mesh2D.vertices: normals.append(normal)
-            return self.__aecGeometry.mesh3D(vertices = mesh2D.vertices,
+            mesh = self.__aecGeometry.mesh3D(vertices = mesh2D.vertices,
                                              indices = mesh2D.indices,
                                              normals = normals)            
+            self.__cache['mesh_ceiling'] = mesh
+            return self.__copyMesh(mesh)
         except:
             traceback.print_exc() 
             return None
@@ -553,13 +663,16 @@ class aecSpace:
         Returns None on failure.
         """
         try:
+            if 'mesh_floor' in self.__cache: return self.__copyMesh(self.__cache['mesh_floor'])
             mesh2D = self.__aecGeometry.getMesh2D(self.points_floor)
             normal = self.normal_floor
             normals = []
             for vertex in mesh2D.vertices: normals.append(normal)
-            return self.__aecGeometry.mesh3D(vertices = mesh2D.vertices,
+            mesh = self.__aecGeometry.mesh3D(vertices = mesh2D.vertices,
                                              indices = mesh2D.indices,
                                              normals = normals)            
+            self.__cache['mesh_floor'] = mesh
+            return self.__copyMesh(mesh)
         except:
             traceback.print_exc() 
             return None        
@@ -573,16 +686,13 @@ class aecSpace:
         Returns None on failure.
         """
         try:
-            space_mesh = self.mesh
-            vertices = []
-            indices = []
-            normals = []
-            for item in space_mesh.vertices: vertices += [item[0], item[1], item[2]]
-            for item in space_mesh.indices: indices += [item[0], item[1], item[2]]
-            for item in space_mesh.normals: normals += [item[0], item[1], item[2]]
-            return aecGeometry.mesh3Dgraphic(vertices = vertices, 
-                                             indices = indices, 
-                                             normals = normals)
+            if 'mesh_graphic' in self.__cache: return self.__copyMesh(self.__cache['mesh_graphic'])
+            arrays = self.__meshArrays(numpy.float64)
+            mesh = aecGeometry.mesh3Dgraphic(vertices = arrays.vertices.ravel().tolist(), 
+                                             indices = arrays.indices.ravel().tolist(), 
+                                             normals = arrays.normals.ravel().tolist())
+            self.__cache['mesh_graphic'] = mesh
+            return self.__copyMesh(mesh)
         except Exception:
             traceback.print_exc() 
             return None   
@@ -595,6 +705,7 @@ class aecSpace:
         Returns None on failure.
         """
         try:
+            if 'mesh_sides' in self.__cache: return [self.__copyMesh(mesh) for mesh in self.__cache['mesh_sides']]
             sides = self.points_sides
             normals = self.normal_sides
             meshes = []
@@ -608,7 +719,8 @@ class aecSpace:
                                                 indices = side_indices,
                                                 normals = side_normals))
                index += 1
-            return meshes
+            self.__cache['mesh_sides'] = meshes
+            return [self.__copyMesh(mesh) for mesh in meshes]
         except Exception:
             traceback.print_exc() 
             return None 
@@ -673,10 +785,12 @@ class aecSpace:
         Returns None on failure.
         """
         try:
+            if 'normal_sides' in self.__cache: return list(self.__cache['normal_sides'])
             normals = []
             for side in self.points_sides:
                 normals.append(self.__aecGeometry.getNormal(side[0], side[3], side[1]))
-            return normals
+            self.__cache['normal_sides'] = normals
+            return list(normals)
         except Exception:
             traceback.print_exc() 
             return None                  
@@ -689,13 +803,7 @@ class aecSpace:
         Returns None on failure.        
         """
         try:
-            box = self.points_box
-            within = False
-            while not within:
-                x = uniform(box.SW.x, box.SE.x)
-                y = uniform(box.SW.y, box.NW.y)
-                within = self.containsPoint(aecPoint(x, y))
-            return aecPoint(x, y, self.elevation)
+            return self.randomPoint(ceiling = True)
         except Exception:
             traceback.print_exc() 
             return None 
@@ -734,13 +842,7 @@ class aecSpace:
         Returns None on failure.        
         """
         try:
-            box = self.points_box
-            within = False
-            while not within:
-                x = uniform(box.SW.x, box.SE.x)
-                y = uniform(box.SW.y, box.NW.y)
-                within = self.containsPoint(aecPoint(x, y))
-            return aecPoint(x, y, self.level)
+            return self.randomPoint()
         except Exception:
             traceback.print_exc() 
             return None   
@@ -756,12 +858,13 @@ class aecSpace:
         try:
             bounds = self.__boundary.bounds
             level = self.level
-            return aecGeometry.quad_points(ID = 0,
-                                           SW = aecPoint(bounds[0], bounds[1], level),
-                                           SE = aecPoint(bounds[2], bounds[1], level),
-                                           NE = aecPoint(bounds[2], bounds[3], level),
-                                           NW = aecPoint(bounds[0], bounds[3], level),
-                                           normal = self.normal_floor)
+            box = aecGeometry.quad_points(ID = 0,
+                                          SW = aecPoint(bounds[0], bounds[1], level),
+                                          SE = aecPoint(bounds[2], bounds[1], level),
+                                          NE = aecPoint(bounds[2], bounds[3], level),
+                                          NW = aecPoint(bounds[0], bounds[3], level),
+                                          normal = self.normal_floor)
+            return box
         except:
             traceback.print_exc() 
             return None
@@ -774,7 +877,8 @@ class aecSpace:
         Returns None on failure
         """
         try:
-            return [aecPoint(pnt.x, pnt.y, self.elevation) for pnt in self.points_floor]
+            elevation = self.elevation
+            return [aecPoint(x, y, elevation) for x, y in self.__coords.tolist()]
         except Exception:
             traceback.print_exc()
             return None
@@ -787,7 +891,8 @@ class aecSpace:
         Returns None on failure.
         """
         try:
-            return [aecPoint(pnt.x, pnt.y, self.level) for pnt in self.__points_floor]
+            level = self.level
+            return [aecPoint(x, y, level) for x, y in self.__coords.tolist()]
         except:
             traceback.print_exc() 
             return None
@@ -842,6 +947,19 @@ class aecSpace:
             traceback.print_exc() 
             return None               
 
+    @property
+    def version(self) -> int:
+        """
+        Property
+        Returns a counter that advances whenever the boundary,
+        level, or height changes.
+        """
+        try:
+            return self.__version
+        except Exception:
+            traceback.print_exc() 
+            return None
+
     @property
     def volume(self) -> float:
         """
@@ -879,6 +997,47 @@ class aecSpace:
             traceback.print_exc()
             return False
 
+    def clone(self, x: float = 0, y: float = 0, z: float = 0) -> 'aecSpace':
+        """
+        Returns a new aecSpace with the boundary, color, height, level, and name
+        of this space, moved by the delivered x, y, and z displacements.
+        Without a horizontal displacement the clone shares the immutable
+        coordinate array and shapely boundary of this space; otherwise both
+        are translated once without revalidating the boundary.
+        Returns None on failure.
+        """
+        try:
+            space = aecSpace.__new__(aecSpace)
+            coords = self.__coords
+            boundary = self.__boundary
+            prepared = self.__prepared
+            if x or y:
+                coords = coords + (float(x), float(y))
+                coords.flags.writeable = False
+                boundary = shapelyAffine.translate(boundary, float(x), float(y))
+                prepared = None
+            color = aecColor()
+            color.color = self.__color.color
+            color.alpha = self.__color.alpha
+            space.__address = (0, 0, 0)
+            space.__boundary = boundary
+            space.__cache = {}
+            if 'area' in self.__cache: space.__cache['area'] = self.__cache['area']
+            space.__color = color
+            space.__convex = self.__convex
+            space.__coords = coords
+            space.__height = self.__height
+            space.__ID = None
+            space.__level = self.__level + float(z)
+            space.__name = self.__name
+            space.__prepared = prepared
+            space.__version = 0
+            space.__watchers = None
+            return space
+        except Exception:
+            traceback.print_exc()
+            return None
+
     def compassLine(self, orient: int = aecGeometry.N) -> List[aecPoint]:
         """
         Returns a line as two endpoints, the spacefloor center and a point
@@ -909,7 +1068,7 @@ class aecSpace:
         Returns None on failure.
         """
         try:
-            return self.boundary.contains(shapely.Point(point.x, point.y))
+            return self.boundary_prepared.contains(shapely.Point(point.x, point.y))
         except Exception:
             traceback.print_exc()
             return None
@@ -922,7 +1081,7 @@ class aecSpace:
         try:
             shape_points = [pnt.xy for pnt in points]
             shape = shapely.polygon.orient(shapely.Polygon(shape_points))
-            return self.boundary.contains(shape)
+            return self.boundary_prepared.contains(shape)
         except Exception:
             traceback.print_exc()
             return None
@@ -936,7 +1095,7 @@ class aecSpace:
         Returns None on failure.
         """
         try:
-            return self.boundary.containsPoint(point) and \
+            return self.containsPoint(point) and \
                    point.z >= self.level and point.z <= self.elevation
         except Exception:
             traceback.print_exc()
@@ -951,8 +1110,7 @@ class aecSpace:
         Returns None on failure.
         """
         try:
-            points = [pnt.xy for pnt in points]
-            return self.boundary.containsShape(points) and \
+            return self.containsShape(points) and \
                    level >= self.level and self.elevation >= elevation
         except Exception:
             traceback.print_exc()
@@ -974,6 +1132,94 @@ class aecSpace:
             traceback.print_exc()
             return None
     
+    @classmethod
+    def fromArray(cls, coords: numpy.ndarray, level: float = 0, height: float = 1) -> 'aecSpace':
+        """
+        Returns a new aecSpace at the delivered level and height with a boundary
+        from an (N, 2) array of coordinates, without building the default boundary.
+        Colinear points are removed and the boundary is made anticlockwise.
+        Returns None on failure.
+        """
+        try:
+            coords = cls.__aecGeometry.rmvColinearArray(coords)
+            if len(coords) < 3: raise ValueError('Need at least three non-colinear points')
+            space = cls.__new__(cls)
+            space.__setDefaults()
+            space.__level = float(level)
+            space.__height = float(height)
+            if not space.__setCoords(cls.__aecGeometry.orientArray(coords)): return None
+            return space
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    @classmethod
+    def fromArrays(cls, coords: numpy.ndarray, level: float = 0, height: float = 1) -> List['aecSpace']:
+        """
+        Returns a list of K new aecSpaces at the delivered level and height from
+        a (K, N, 2) array of boundary coordinates, orienting the boundaries and
+        building their polygons together. Boundaries with repeated or colinear
+        points are built individually as by fromArray.
+        Returns None on failure.
+        """
+        try:
+            coords = numpy.array(coords, dtype = numpy.float64)[:, :, :2]
+            if coords.shape[1] > 3 and numpy.array_equal(coords[:, 0], coords[:, -1]): coords = coords[:, :-1]
+            edges = numpy.roll(coords, -1, axis = 1) - coords
+            prvEdges = numpy.roll(edges, 1, axis = 1)
+            cross = (prvEdges[:, :, 0] * edges[:, :, 1]) - (prvEdges[:, :, 1] * edges[:, :, 0])
+            area = (coords[:, :, 0] * numpy.roll(coords[:, :, 1], -1, axis = 1)).sum(axis = 1) - \
+                   (numpy.roll(coords[:, :, 0], -1, axis = 1) * coords[:, :, 1]).sum(axis = 1)
+            clockwise = area < 0
+            coords[clockwise] = numpy.roll(coords[clockwise][:, ::-1], 1, axis = 1)
+            cross[clockwise] = -cross[clockwise]
+            simple = numpy.all(cross != 0, axis = 1)
+            convex = numpy.all(cross > 0, axis = 1)
+            coords.flags.writeable = False
+            polygons = numpy.empty(len(coords), dtype = object)
+            polygons[simple] = shapelyArray.polygons(coords[simple])
+            spaces = []
+            for index in range(len(coords)):
+                if not simple[index]:
+                    spaces.append(cls.fromArray(coords[index], level, height))
+                    continue
+                space = cls.__new__(cls)
+                space.__setDefaults()
+                space.__level = float(level)
+                space.__height = float(height)
+                space.__setCoords(coords[index], polygons[index], bool(convex[index]))
+                spaces.append(space)
+            return spaces
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    @classmethod
+    def fromPolygon(cls, polygon: shapely.Polygon, level: float = 0, height: float = 1) -> 'aecSpace':
+        """
+        Returns a new aecSpace at the delivered level and height with the
+        exterior of a shapely polygon as its boundary, keeping the polygon
+        itself if it is already anticlockwise and free of colinear points.
+        Returns None on failure.
+        """
+        try:
+            exterior = shapelyArray.get_coordinates(polygon.exterior)[:-1]
+            coords = cls.__aecGeometry.rmvColinearArray(exterior)
+            if len(coords) < 3: raise ValueError('Need at least three non-colinear points')
+            coords = cls.__aecGeometry.orientArray(coords)
+            if len(coords) != len(exterior) or not numpy.array_equal(coords, exterior) or \
+               len(polygon.interiors) > 0:
+                return cls.fromArray(coords, level, height)
+            space = cls.__new__(cls)
+            space.__setDefaults()
+            space.__level = float(level)
+            space.__height = float(height)
+            if not space.__setCoords(coords, polygon): return None
+            return space
+        except Exception:
+            traceback.print_exc()
+            return None
+
     def mirror(self, points: List[aecPoint] = None) -> bool:
         """
         Mirrors the space orthogonally around the specified line as defined
@@ -983,9 +1229,12 @@ class aecSpace:
         """
         try:
             if not points: points = self.axis_major
-            newPoints = self.__aecGeometry.mirrorPoints2D(self.points_floor, points[0], points[1])
-            if not newPoints: return False
-            return self.__setBoundary(newPoints)
+            origin = numpy.array(points[0].xy)
+            axis = numpy.array(points[1].xy) - origin
+            axis /= numpy.linalg.norm(axis)
+            coords = self.__coords - origin
+            coords = (2 * numpy.outer(coords @ axis, axis)) - coords + origin
+            return self.__setCoords(numpy.roll(coords[::-1], 1, axis = 0))
         except Exception:
             traceback.print_exc()
             return False
@@ -997,9 +1246,9 @@ class aecSpace:
         Returns False on failure.
         """
         try:
-            points = [aecPoint(pnt.x + x, pnt.y + y) for pnt in self.points_floor]
+            coords = self.__coords + (float(x), float(y))
             self.level += z
-            return self.__setBoundary(points)
+            return self.__setCoords(coords)
         except Exception:
             traceback.print_exc()
             return False
@@ -1019,6 +1268,28 @@ class aecSpace:
             traceback.print_exc()
             return False
 
+    def randomPoint(self, ceiling: bool = False, rng = None) -> aecPoint:
+        """
+        Returns a random point within the space boundary at the floor level,
+        or at the ceiling level if ceiling is True.
+        Draws from the delivered seed, random.Random, or numpy Generator,
+        or from the random module if none is delivered.
+        Returns None on failure.
+        """
+        try:
+            rng = aecRandom(rng)
+            box = self.points_box
+            within = False
+            while not within:
+                x = rng.uniform(box.SW.x, box.SE.x)
+                y = rng.uniform(box.SW.y, box.NW.y)
+                within = self.containsPoint(aecPoint(x, y))
+            if ceiling: return aecPoint(x, y, self.elevation)
+            return aecPoint(x, y, self.level)
+        except Exception:
+            traceback.print_exc()
+            return None
+
     def rotate(self, angle: float = 180, point: aecPoint = None) -> bool:
         """
         Rotates the space anticlockwise around the 2D pivot point
@@ -1032,9 +1303,7 @@ class aecSpace:
             if not point: point = self.centroid_floor
             polygon = shapelyAffine.rotate(self.__boundary, angle, point.xy)
             if type(polygon) != shapely.polygon.Polygon: return False
-            self.__boundary = polygon
-            points = [aecPoint(pnt[0], pnt[1]) for pnt in polygon.exterior.coords[:-1]]
-            return self.__setBoundary(points)
+            return self.__setCoords(shapelyArray.get_coordinates(polygon)[:-1], polygon)
         except Exception:
             traceback.print_exc()
             return False    
@@ -1047,18 +1316,51 @@ class aecSpace:
         Returns False on failure.
         """
         try:
-            prePoints = self.points_floor
+            if float(x) * float(y) == 0: return False
             if not point: point = self.centroid_floor
             polygon = shapelyAffine.scale(self.__boundary, x, y, 1, point.xy)
             if type(polygon) != shapely.polygon.Polygon: return False
-            points = [aecPoint(pnt[0], pnt[1]) for pnt in polygon.exterior.coords[:-1]] 
+            polygon = shapely.polygon.orient(polygon)
             self.height *= float(z)
-            return self.__setBoundary(points)
+            return self.__setCoords(shapelyArray.get_coordinates(polygon)[:-1], polygon)
         except Exception:
-            self.__setBoundary(prePoints)
             traceback.print_exc()
             return False        
         
+    def setCoords(self, coords: numpy.ndarray, polygon: shapely.Polygon = None, 
+                  convex: bool = None) -> bool:
+        """
+        Sets the boundary from an anticlockwise (N, 2) array of coordinates free
+        of colinear points, with the matching shapely polygon and convexity if known.
+        The coordinates are trusted as delivered; use the boundary property or
+        fromArray for coordinates that may need orienting or cleaning.
+        Returns True on success.
+        Returns False on failure.
+        """
+        try:
+            return self.__setCoords(coords, polygon, convex)
+        except Exception:
+            traceback.print_exc()
+            return False
+
+    def watch(self, flag: dict) -> bool:
+        """
+        Registers a dictionary whose 'stale' entry is set True the next time the
+        boundary, level, or height changes, letting owners such as aecSpaceGroup
+        check for changes without polling the version of every space.
+        Flags already stale are released.
+        Returns True on success.
+        Returns False on failure.
+        """
+        try:
+            watchers = [watcher for watcher in self.__watchers or () if not watcher['stale']]
+            watchers.append(flag)
+            self.__watchers = watchers
+            return True
+        except Exception:
+            traceback.print_exc()
+            return False
+
     def wrap(self, points: List[aecPoint]) -> bool:
         """
         Sets the boundary to a convex hull
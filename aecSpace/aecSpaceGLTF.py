@@ -0,0 +1,341 @@
+import base64
+import json
+import numpy
+import os
+import struct
+import traceback
+
+from typing import Iterator, List, Tuple
+
+from .aecGeometry import aecGeometry
+from .aecSpace import aecSpace
+
+"""
+aecSpaceGLTF accepts lists of aecSpaces or an aecSpaceGroup
+instance and writes them to a binary glTF (GLB).
+"""
+
+class aecSpaceGLTF:
+    """
+    Writes meshes to a single binary buffer and emits GLB directly from numpy arrays.
+    The meshes of all spaces sharing a material are merged into one primitive,
+    so a model of many spaces costs one draw call per material. A mesh written
+    once may be displayed by any number of nodes, each with its own material
+    and translation, without writing its buffers again.
+    """
+
+    # Matches the root node of the hypar glTF writer, turning
+    # the Z-up coordinates of aecSpace into the Y-up axes of glTF.
+
+    matrix_root = \
+    [
+        1.0, 0.0, 0.0, 0.0,
+        0.0, 0.0, -1.0, 0.0,
+        0.0, 1.0, 0.0, 0.0,
+        0.0, 0.0, 0.0, 1.0,
+    ]
+
+    # glTF accessor component types and buffer view targets.
+
+    FLOAT, UNSIGNED_SHORT, UNSIGNED_INT = 5126, 5123, 5125
+    ARRAY_BUFFER, ELEMENT_ARRAY_BUFFER = 34962, 34963
+    TRIANGLES = 4
+
+    __slots__ = \
+    [
+        '__accessors',
+        '__buffer',
+        '__bufferViews',
+        '__colors',
+        '__length',
+        '__materials',
+        '__meshes',
+        '__nodes',
+        '__primitives',
+    ]
+
+    def __init__(self):
+        """
+        Constructor creates an empty model with a root node.
+        """
+        self.__accessors = []
+        self.__buffer = []
+        self.__bufferViews = []
+        self.__colors = {}
+        self.__length = 0
+        self.__materials = []
+        self.__meshes = {}
+        self.__nodes = [{'children': [], 'matrix': list(self.matrix_root), 'name': 'root'}]
+        self.__primitives = []
+
+    def __addBufferView(self, data: numpy.ndarray, target: int) -> int:
+        """
+        Appends an array to the binary buffer, padded to four bytes, and returns
+        the index of a new buffer view of it. Read-only arrays, such as the cached
+        meshes of spaces, are kept without copying them.
+        """
+        data = numpy.ascontiguousarray(data)
+        if data.flags.writeable:
+            data = data.copy()
+            data.flags.writeable = False
+        self.__bufferViews.append({'buffer': 0,
+                                   'byteOffset': self.__length,
+                                   'byteLength': data.nbytes,
+                                   'target': target})
+        self.__buffer.append(data)
+        self.__length += data.nbytes
+        padding = -data.nbytes % 4
+        if padding:
+            self.__buffer.append(bytes(padding))
+            self.__length += padding
+        return len(self.__bufferViews) - 1
+
+    def __addAccessor(self, data: numpy.ndarray, componentType: int,
+                      accessorType: str, target: int, bounds: bool = False) -> int:
+        """
+        Writes an array to the binary buffer and returns the index of a new accessor of it.
+        """
+        accessor = \
+        {
+            'bufferView': self.__addBufferView(data, target),
+            'byteOffset': 0,
+            'componentType': componentType,
+            'count': len(data),
+            'type': accessorType,
+        }
+        if bounds:
+            accessor['max'] = data.max(axis = 0).tolist()
+            accessor['min'] = data.min(axis = 0).tolist()
+        self.__accessors.append(accessor)
+        return len(self.__accessors) - 1
+
+    @property
+    def byte_length(self) -> int:
+        """
+        Property
+        Returns the length in bytes of the binary buffer.
+        Returns None on failure.
+        """
+        try:
+            return self.__length
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    @property
+    def node_count(self) -> int:
+        """
+        Property
+        Returns the count of nodes, including the root node.
+        Returns None on failure.
+        """
+        try:
+            return len(self.__nodes)
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    def addMaterial(self, red: float, green: float, blue: float, alpha: float = 1.0,
+                    metallic: float = 0.0, name: str = None) -> int:
+        """
+        Adds a material from RGBA values between 0 and 1, matching the
+        materials of the hypar glTF writer, and returns its index.
+        Returns None on failure.
+        """
+        try:
+            material = \
+            {
+                'pbrMetallicRoughness':
+                {
+                    'baseColorFactor': [red, green, blue, alpha],
+                    'metallicFactor': metallic
+                },
+                'alphaMode': 'BLEND' if alpha < 1.0 else 'OPAQUE',
+                'extensions':
+                {
+                    'KHR_materials_pbrSpecularGlossiness':
+                    {
+                        'diffuseFactor': [red, green, blue, alpha],
+                        'specularFactor': [1.0, 1.0, 1.0],
+                        'glossinessFactor': 0.5
+                    }
+                }
+            }
+            if name is not None: material['name'] = name
+            self.__materials.append(material)
+            return len(self.__materials) - 1
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    def addMesh(self, mesh: aecGeometry.mesh3Darray) -> int:
+        """
+        Writes the vertices, normals, and indices of an array mesh
+        to the binary buffer and returns an index to deliver to addNode.
+        Returns None on failure.
+        """
+        try:
+            vertices = numpy.asarray(mesh.vertices, dtype = numpy.float32).reshape(-1, 3)
+            normals = numpy.asarray(mesh.normals, dtype = numpy.float32).reshape(-1, 3)
+            indices = numpy.asarray(mesh.indices).ravel()
+            if len(vertices) <= 65535:
+                indices = indices.astype(numpy.uint16)
+                indexType = self.UNSIGNED_SHORT
+            else:
+                indices = indices.astype(numpy.uint32)
+                indexType = self.UNSIGNED_INT
+            attributes = \
+            {
+                'NORMAL': self.__addAccessor(normals, self.FLOAT, 'VEC3', self.ARRAY_BUFFER),
+                'POSITION': self.__addAccessor(vertices, self.FLOAT, 'VEC3', self.ARRAY_BUFFER, True),
+            }
+            index = self.__addAccessor(indices, indexType, 'SCALAR', self.ELEMENT_ARRAY_BUFFER)
+            self.__primitives.append({'attributes': attributes, 'indices': index})
+            return len(self.__primitives) - 1
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    def addNode(self, mesh: int, material: int, name: str = None,
+                translation: Tuple[float, float, float] = None) -> int:
+        """
+        Adds a node under the root displaying a mesh returned by addMesh
+        with the indicated material, optionally moved by an xyz translation.
+        Each combination of mesh and material is written as a glTF mesh once.
+        Returns the index of the node.
+        Returns None on failure.
+        """
+        try:
+            key = (mesh, material)
+            if key not in self.__meshes:
+                primitive = dict(self.__primitives[mesh], material = material, mode = self.TRIANGLES)
+                self.__meshes[key] = (len(self.__meshes), {'primitives': [primitive]})
+            node = {'mesh': self.__meshes[key][0]}
+            if name is not None: node['name'] = name
+            if translation is not None and any(translation):
+                node['translation'] = [float(value) for value in translation]
+            self.__nodes.append(node)
+            self.__nodes[0]['children'].append(len(self.__nodes) - 1)
+            return len(self.__nodes) - 1
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    def addSpaces(self, spaces: List[aecSpace], material: int = None, name: str = None) -> List[int]:
+        """
+        Accepts a list of aecSpaces or an aecSpaceGroup and merges the meshes
+        of all spaces sharing a material into a single mesh and node.
+        Without a material, each space uses a material matching its color.
+        Returns the list of new node indices.
+        Returns None on failure.
+        """
+        try:
+            spaces = getattr(spaces, 'spaces', spaces)
+            groups = {}
+            for space in spaces:
+                spcMaterial = material
+                if spcMaterial is None: spcMaterial = self.getColorMaterial(space)
+                groups.setdefault(spcMaterial, []).append(space.mesh_arrays)
+            nodes = []
+            for spcMaterial, meshes in groups.items():
+                counts = numpy.array([len(mesh.vertices) for mesh in meshes])
+                offsets = numpy.cumsum(counts) - counts
+                triangles = numpy.array([len(mesh.indices) for mesh in meshes])
+                indices = numpy.concatenate([mesh.indices for mesh in meshes])
+                indices += numpy.repeat(offsets, triangles).astype(numpy.uint32)[:, numpy.newaxis]
+                merged = aecGeometry.mesh3Darray(
+                    vertices = numpy.concatenate([mesh.vertices for mesh in meshes]),
+                    indices = indices,
+                    normals = numpy.concatenate([mesh.normals for mesh in meshes]))
+                nodes.append(self.addNode(self.addMesh(merged), spcMaterial, name))
+            return nodes
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    def getBase64(self) -> str:
+        """
+        Returns the model as a base64 encoded GLB string.
+        Returns None on failure.
+        """
+        try:
+            return base64.b64encode(self.getGLB()).decode('utf-8')
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    def getColorMaterial(self, space: aecSpace) -> int:
+        """
+        Returns the index of a material matching the color and transparency
+        of the delivered space, adding the material on first use.
+        Returns None on failure.
+        """
+        try:
+            red, green, blue = space.color.color_01
+            color = (red, green, blue, 1.0 - space.color.alpha_01)
+            if color not in self.__colors:
+                self.__colors[color] = self.addMaterial(*color)
+            return self.__colors[color]
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    def __getChunks(self) -> Iterator[memoryview]:
+        """
+        Yields the GLB header, the JSON chunk, and the binary chunk header
+        followed by a view of each array of the binary buffer in turn.
+        """
+        meshes = sorted(self.__meshes.values(), key = lambda mesh: mesh[0])
+        model = \
+        {
+            'asset': {'generator': 'aecSpaceGLTF', 'version': '2.0'},
+            'scene': 0,
+            'scenes': [{'nodes': [0]}],
+            'nodes': self.__nodes,
+            'meshes': [mesh[1] for mesh in meshes],
+            'accessors': self.__accessors,
+            'buffers': [{'byteLength': self.__length}],
+            'bufferViews': self.__bufferViews,
+            'materials': self.__materials,
+            'extensionsUsed': ['KHR_materials_pbrSpecularGlossiness'],
+        }
+        jsonChunk = json.dumps(model, separators = (',', ':')).encode('utf-8')
+        jsonChunk += b' ' * (-len(jsonChunk) % 4)
+        length = 12 + 8 + len(jsonChunk) + 8 + self.__length
+        yield memoryview(struct.pack('<4sII', b'glTF', 2, length))
+        yield memoryview(struct.pack('<I4s', len(jsonChunk), b'JSON'))
+        yield memoryview(jsonChunk)
+        yield memoryview(struct.pack('<I4s', self.__length, b'BIN\x00'))
+        for data in self.__buffer: yield memoryview(data).cast('B')
+
+    def getGLB(self) -> bytes:
+        """
+        Returns the model as GLB bytes, a JSON chunk
+        followed by a single binary buffer chunk.
+        Returns None on failure.
+        """
+        try:
+            return b''.join(self.__getChunks())
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    def write(self, target) -> int:
+        """
+        Writes the model as GLB to the delivered path or binary file-like object
+        one chunk at a time, writing each array of the binary buffer directly
+        from the array, so no copy of the GLB is assembled in memory.
+        Returns the count of bytes written.
+        Returns None on failure.
+        """
+        try:
+            if isinstance(target, (str, bytes, os.PathLike)):
+                with open(target, 'wb') as file: return self.write(file)
+            written = 0
+            for chunk in self.__getChunks():
+                target.write(chunk)
+                written += chunk.nbytes
+            return written
+        except Exception:
+            traceback.print_exc()
+            return None
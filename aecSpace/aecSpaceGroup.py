@@ -1,6 +1,10 @@
+import math
+import numpy
 import traceback
 
-from typing import List, Tuple
+import shapely as shapelyArray
+
+from typing import Dict, List, Tuple
 from uuid import uuid4
 
 from .aecGeometry import aecGeometry
@@ -11,9 +15,14 @@ class aecSpaceGroup:
     """
     Manages multiple aecSpace instances as a single object, 
     enabling collective editing and reporting.
+    Aggregate queries and transformations of all spaces run on a columnar
+    store of packed boundary coordinates and per-space levels and heights,
+    rebuilt only when the membership changes or a space marks the flag it
+    watches for the store stale, so a current store is found in constant time.
+    Results are written back to the spaces, which remain authoritative.
     """
 
-    __slots__ = ['__aecGeometry', '__ID', '__name', '__spaces']
+    __slots__ = ['__aecGeometry', '__ID', '__name', '__spaces', '__store']
       
     def __init__(self, x:float = 0, y:float = 0, z:float = 0):
         """
@@ -23,6 +32,126 @@ class aecSpaceGroup:
         self.__ID = str(uuid4())
         self.__name = ''
         self.__spaces = []
+        self.__store = None
+
+    def __dropStore(self):
+        """
+        Discards the columnar store after a change of membership,
+        releasing its flag from the spaces watching it.
+        """
+        if self.__store is not None: self.__store['flag']['stale'] = True
+        self.__store = None
+
+    def __getStore(self) -> dict:
+        """
+        Returns the columnar store of the current spaces, rebuilding it
+        if spaces were added, removed, or changed since it was built.
+        """
+        store = self.__store
+        spaces = self.__spaces
+        if store is not None and not store['flag']['stale'] and len(store['spaces']) == len(spaces):
+            return store
+        self.__dropStore()
+        coords = [space.coords_floor for space in spaces]
+        counts = numpy.array([len(points) for points in coords], dtype = numpy.int64)
+        offsets = numpy.zeros(len(spaces) + 1, dtype = numpy.int64)
+        numpy.cumsum(counts, out = offsets[1:])
+        if coords: coords = numpy.concatenate(coords)
+        else: coords = numpy.zeros((0, 2))
+        self.__store = \
+        {
+            'spaces': list(spaces),
+            'flag': self.__watchStore(spaces),
+            'coords': coords,
+            'offsets': offsets,
+            'owners': numpy.repeat(numpy.arange(len(spaces)), counts),
+            'polygons': numpy.empty(len(spaces), dtype = object),
+            'levels': numpy.array([space.level for space in spaces], dtype = numpy.float64),
+            'heights': numpy.array([space.height for space in spaces], dtype = numpy.float64),
+        }
+        self.__store['polygons'][:] = [space.boundary for space in spaces]
+        for key in ('coords', 'offsets', 'levels', 'heights'): self.__store[key].flags.writeable = False
+        return self.__store
+
+    def __setStore(self, store: dict, coords: numpy.ndarray = None, 
+                   levels: numpy.ndarray = None, heights: numpy.ndarray = None):
+        """
+        Writes new packed coordinates, levels, or heights back to every space
+        of the store, building all new boundary polygons in one call, then
+        watches the spaces with a new flag so the store stays current.
+        """
+        spaces = store['spaces']
+        offsets = store['offsets'].tolist()
+        if coords is not None:
+            coords = numpy.ascontiguousarray(coords, dtype = numpy.float64)
+            coords.flags.writeable = False
+            rings = shapelyArray.linearrings(coords, indices = store['owners'])
+            polygons = shapelyArray.polygons(rings)
+            for index, space in enumerate(spaces):
+                space.setCoords(coords[offsets[index]:offsets[index + 1]], 
+                                polygons[index], space.convex)
+            store['coords'] = coords
+            store['polygons'] = polygons
+            store.pop('tree', None)
+        if levels is not None:
+            for space, level in zip(spaces, levels.tolist()): space.level = level
+            store['levels'] = levels
+            levels.flags.writeable = False
+        if heights is not None:
+            for space, height in zip(spaces, heights.tolist()): space.height = height
+            store['heights'] = heights
+            heights.flags.writeable = False
+        store['flag']['stale'] = True
+        store['flag'] = self.__watchStore(spaces)
+
+    def __query(self, geometry, predicate: str = None, levels: Tuple[float, float] = None) -> numpy.ndarray:
+        """
+        Returns the sorted indices of the spaces whose boundaries satisfy the
+        predicate with the delivered geometry, found through a 2D STRtree of
+        the boundaries that is discarded whenever the boundaries change.
+        Applies the level band filter if levels are delivered.
+        """
+        store = self.__getStore()
+        indices = numpy.sort(self.__getTree(store).query(geometry, predicate = predicate))
+        return self.__withinLevels(store, indices, levels)
+
+    def __getTree(self, store: dict) -> shapelyArray.STRtree:
+        """
+        Returns the STRtree of the boundaries in the store, building it on first use.
+        """
+        if 'tree' not in store: store['tree'] = shapelyArray.STRtree(store['polygons'])
+        return store['tree']
+
+    def __watchStore(self, spaces: List[aecSpace]) -> dict:
+        """
+        Returns a new flag for a store of the spaces, watched by every space.
+        """
+        flag = {'stale': False}
+        for space in spaces: space.watch(flag)
+        return flag
+
+    def __withinLevels(self, store: dict, indices: numpy.ndarray, 
+                       levels: Tuple[float, float] = None) -> numpy.ndarray:
+        """
+        Returns the indices of spaces extending vertically into the closed
+        band between the delivered bottom and top levels, or all indices
+        if no band is delivered.
+        """
+        if levels is None: return indices
+        bottom, top = levels
+        spcLevels = store['levels'][indices]
+        spcTops = spcLevels + store['heights'][indices]
+        return indices[(spcLevels <= top) & (spcTops >= bottom)]
+
+    def __toGeometry(self, shape):
+        """
+        Returns a shapely geometry from an aecPoint, an aecSpace, 
+        a list of aecPoints, or a shapely geometry.
+        """
+        if isinstance(shape, aecPoint): return shapelyArray.points(shape.xy)
+        if isinstance(shape, aecSpace): return shape.boundary
+        if isinstance(shape, (list, tuple)): return shapelyArray.polygons([point.xy for point in shape])
+        return shape
         
     @property
     def area(self) -> float:
@@ -32,9 +161,29 @@ class aecSpaceGroup:
         Return None on failure.
         """
         try:
-            space_area = 0
-            for space in self.__spaces: space_area += space.area
-            return space_area
+            return float(self.areas.sum())
+        except Exception:
+            traceback.print_exc()
+            return None   
+
+    @property
+    def areas(self) -> numpy.ndarray:
+        """
+        Property
+        Returns an array of the area of each space, computed
+        together from the packed boundary coordinates.
+        Return None on failure.
+        """
+        try:
+            store = self.__getStore()
+            coords = store['coords']
+            offsets = store['offsets']
+            if len(offsets) == 1: return numpy.zeros(0)
+            following = numpy.arange(1, len(coords) + 1)
+            following[offsets[1:] - 1] = offsets[:-1]
+            nxtCoords = coords[following]
+            cross = (coords[:, 0] * nxtCoords[:, 1]) - (nxtCoords[:, 0] * coords[:, 1])
+            return numpy.add.reduceat(cross, offsets[:-1]) * 0.5
         except Exception:
             traceback.print_exc()
             return None   
@@ -47,11 +196,40 @@ class aecSpaceGroup:
         Return None on failure.
         """
         try:
+            self.__dropStore()
             return self.__spaces.sort(key = lambda space: space.level)
         except Exception:
             traceback.print_exc()
             return None     
 
+    @property
+    def colors(self) -> numpy.ndarray:
+        """
+        Property
+        Returns an (K, 4) array of the RGB and alpha values of each space.
+        Return None on failure.
+        """
+        try:
+            colors = [space.color.color + (space.color.alpha,) for space in self.__spaces]
+            return numpy.array(colors, dtype = numpy.uint8).reshape(-1, 4)
+        except Exception:
+            traceback.print_exc()
+            return None    
+
+    @property
+    def coords(self) -> numpy.ndarray:
+        """
+        Property
+        Returns a read-only (M, 2) array of the boundary coordinates of all
+        spaces packed in order, divided between spaces by offsets.
+        Return None on failure.
+        """
+        try:
+            return self.__getStore()['coords']
+        except Exception:
+            traceback.print_exc()
+            return None    
+
     @property
     def count(self) -> float:
         """
@@ -65,6 +243,19 @@ class aecSpaceGroup:
             traceback.print_exc()
             return None   
         
+    @property
+    def heights(self) -> numpy.ndarray:
+        """
+        Property
+        Returns a read-only array of the height of each space.
+        Return None on failure.
+        """
+        try:
+            return self.__getStore()['heights']
+        except Exception:
+            traceback.print_exc()
+            return None    
+
     @property
     def indices(self) -> List[int]:
         """
@@ -78,6 +269,19 @@ class aecSpaceGroup:
             traceback.print_exc()
             return None    
 
+    @property
+    def levels(self) -> numpy.ndarray:
+        """
+        Property
+        Returns a read-only array of the level of each space.
+        Return None on failure.
+        """
+        try:
+            return self.__getStore()['levels']
+        except Exception:
+            traceback.print_exc()
+            return None    
+
     @property
     def name(self) -> str:
         """
@@ -104,11 +308,27 @@ class aecSpaceGroup:
             self.__name = name
             traceback.print_exc() 
 
+    @property
+    def offsets(self) -> numpy.ndarray:
+        """
+        Property
+        Returns a read-only array of K + 1 offsets into coords, where the
+        boundary of space k occupies coords[offsets[k]:offsets[k + 1]].
+        Return None on failure.
+        """
+        try:
+            return self.__getStore()['offsets']
+        except Exception:
+            traceback.print_exc()
+            return None    
+
     @property
     def spaces(self) -> List[aecSpace]:
         """
         Property
         Returns the list of aecSpaces.
+        Spaces appended to or removed from the list are noticed, but reorder
+        or replace spaces by setting this property so the group notices.
         Returns None on failure.
         """
         try:
@@ -127,6 +347,7 @@ class aecSpaceGroup:
         try:
             preSpaces = self.__spaces
             self.__spaces = value
+            self.__dropStore()
         except Exception:
             self.__spaces = preSpaces
             traceback.print_exc()
@@ -140,9 +361,7 @@ class aecSpaceGroup:
         Returns None on failure.
         """
         try:
-            space_volume = 0
-            for space in self.__spaces: space_volume += space.volume
-            return space_volume
+            return float(numpy.dot(self.areas, self.__getStore()['heights']))
         except Exception:
             traceback.print_exc()
             return None    
@@ -155,11 +374,35 @@ class aecSpaceGroup:
         """
         try:
             for space in spaces: self.__spaces.append(space)
+            self.__dropStore()
             return True
         except Exception:
             traceback.print_exc()
             return False
         
+    def adjacency(self, tolerance: float = 0, length: float = 0) -> Dict[int, List[int]]:
+        """
+        Returns the adjacency graph of the spaces as a dictionary mapping the
+        index of every space to the ascending indices of its neighbors.
+        Spaces are adjacent if they extend into a common band of levels and more
+        than the delivered length of the boundary of one lies within the tolerance
+        of the boundary of the other, so with the defaults only spaces sharing
+        part of a wall are adjacent.
+        Returns None on failure.
+        """
+        try:
+            store = self.__getStore()
+            graph = self.__aecGeometry.getAdjacency(store['polygons'], tolerance, length, self.__getTree(store))
+            levels = store['levels'].tolist()
+            tops = (store['levels'] + store['heights']).tolist()
+            for index, neighbors in graph.items():
+                neighbors[:] = [neighbor for neighbor in neighbors 
+                                if levels[neighbor] <= tops[index] and tops[neighbor] >= levels[index]]
+            return graph
+        except Exception:
+            traceback.print_exc()
+            return None
+
     def clear(self) -> bool:
         """
         Sets the space list to an empty list.
@@ -168,6 +411,7 @@ class aecSpaceGroup:
         """
         try:
             self.__spaces = []
+            self.__dropStore()
             return True
         except Exception:
             traceback.print_exc()
@@ -185,6 +429,7 @@ class aecSpaceGroup:
             if index > len(spaces) or index < 0 - 1: return False
             del spaces[index]
             self.__spaces = spaces
+            self.__dropStore()
             return True
         except Exception:
             traceback.print_exc()
@@ -204,7 +449,12 @@ class aecSpaceGroup:
                 if index > len(spaces) or index < 0 - 1: return False
                 self.__spaces[index].moveBy(x, y, z)
             else:
-                for space in self.__spaces: space.moveBy(x, y, z)
+                store = self.__getStore()
+                coords = None
+                levels = None
+                if x or y: coords = store['coords'] + (float(x), float(y))
+                if z: levels = store['levels'] + float(z)
+                self.__setStore(store, coords, levels)
             return True
         except Exception:
             traceback.print_exc()
@@ -224,12 +474,43 @@ class aecSpaceGroup:
                 if index > len(spaces) or index < 0 - 1: return False
                 self.__spaces[index].moveTo(fromPnt, toPnt)
             else:
-                for space in self.__spaces: space.moveTo(fromPnt, toPnt)
+                return self.moveBy(toPnt.x - fromPnt.x, toPnt.y - fromPnt.y, toPnt.z - fromPnt.z)
             return True
         except Exception:
             traceback.print_exc()
             return False          
 
+    def nearest(self, point: aecPoint, k: int = 1, levels: Tuple[float, float] = None) -> List[aecSpace]:
+        """
+        Returns up to k spaces in order of their 2D distance from the delivered
+        point, zero for spaces containing it, optionally limited to the spaces
+        extending into the (bottom, top) band of levels.
+        Searches the spatial index within a radius that widens until enough
+        spaces are found instead of measuring the distance to every space.
+        Returns None on failure.
+        """
+        try:
+            store = self.__getStore()
+            spaces = store['spaces']
+            eligible = self.__withinLevels(store, numpy.arange(len(spaces)), levels)
+            k = min(int(k), len(eligible))
+            if k <= 0: return []
+            tree = self.__getTree(store)
+            geometry = self.__toGeometry(point)
+            indices, distances = tree.query_nearest(geometry, return_distance = True, all_matches = False)
+            indices = self.__withinLevels(store, indices, levels)
+            radius = float(distances[0]) or 1.0
+            while len(indices) < k:
+                indices = tree.query(geometry, predicate = 'dwithin', distance = radius)
+                indices = self.__withinLevels(store, indices, levels)
+                radius *= 2
+            distances = shapelyArray.distance(store['polygons'][indices], geometry)
+            order = numpy.lexsort((indices, distances))[:k]
+            return [spaces[index] for index in indices[order].tolist()]
+        except Exception:
+            traceback.print_exc()
+            return None
+
     def rotate(self, angle: float, point: aecPoint = None, index: int = None) -> bool:
         """
         Rotates the indicated space by the delivered angle in degrees.
@@ -245,7 +526,25 @@ class aecSpaceGroup:
                 if index > len(spaces) or index < 0 - 1: return False
                 self.__spaces[index].rotate(angle, point)
             else:
-                for space in self.__spaces: space.rotate(angle, point)
+                store = self.__getStore()
+                if len(store['spaces']) == 0: return True
+                if point: origins = numpy.array([point.xy])
+                else: origins = shapelyArray.get_coordinates(shapelyArray.centroid(store['polygons']))
+                origins = origins[numpy.minimum(store['owners'], len(origins) - 1)]
+                angle = float(angle) * math.pi / 180.0
+                cosp = math.cos(angle)
+                sinp = math.sin(angle)
+                if abs(cosp) < 2.5e-16: cosp = 0.0
+                if abs(sinp) < 2.5e-16: sinp = 0.0
+                x0 = origins[:, 0]
+                y0 = origins[:, 1]
+                xOff = x0 - x0 * cosp + y0 * sinp
+                yOff = y0 - x0 * sinp - y0 * cosp
+                xPnts = store['coords'][:, 0]
+                yPnts = store['coords'][:, 1]
+                coords = numpy.stack([cosp * xPnts - sinp * yPnts + xOff, 
+                                      sinp * xPnts + cosp * yPnts + yOff], axis = 1)
+                self.__setStore(store, coords)
             return True
         except Exception:
             traceback.print_exc()
@@ -327,7 +626,8 @@ class aecSpaceGroup:
                 if index > len(spaces) or index < 0 - 1: return False
                 self.__spaces[index].height = value
             else:            
-                for space in self.__spaces: space.height = value
+                store = self.__getStore()
+                self.__setStore(store, heights = numpy.full(len(store['spaces']), float(value)))
             return True
         except Exception:
             traceback.print_exc()
@@ -347,7 +647,8 @@ class aecSpaceGroup:
                 if index > len(spaces) or index < 0 - 1: return False
                 self.__spaces[index].level = value
             else:            
-                for space in self.__spaces: space.level = value
+                store = self.__getStore()
+                self.__setStore(store, levels = numpy.full(len(store['spaces']), float(value)))
             return True
         except Exception:
             traceback.print_exc()
@@ -373,6 +674,38 @@ class aecSpaceGroup:
             traceback.print_exc()
             return False  
         
+    def spacesAt(self, point: aecPoint, levels: Tuple[float, float] = None) -> List[aecSpace]:
+        """
+        Returns the spaces whose boundaries contain or touch the 2D location
+        of the delivered point, optionally limited to the spaces extending
+        into the (bottom, top) band of levels.
+        Returns None on failure.
+        """
+        try:
+            indices = self.__query(self.__toGeometry(point), 'intersects', levels)
+            spaces = self.__store['spaces']
+            return [spaces[index] for index in indices.tolist()]
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    def spacesIntersecting(self, shape, predicate: str = 'intersects', 
+                           levels: Tuple[float, float] = None) -> List[aecSpace]:
+        """
+        Returns the spaces whose boundaries satisfy the shapely predicate, such as
+        'intersects', 'overlaps', 'touches', or 'within', with the delivered aecSpace,
+        list of aecPoints, or shapely geometry, optionally limited to the spaces
+        extending into the (bottom, top) band of levels.
+        Returns None on failure.
+        """
+        try:
+            indices = self.__query(self.__toGeometry(shape), predicate, levels)
+            spaces = self.__store['spaces']
+            return [spaces[index] for index in indices.tolist()]
+        except Exception:
+            traceback.print_exc()
+            return None
+
     def wrap(self, points: List[aecPoint], index: int = None) -> bool:
         """
         Wraps the indicated space around the delivered points as a convex hull.
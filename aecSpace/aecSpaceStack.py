@@ -0,0 +1,162 @@
+import numpy
+import traceback
+
+from typing import List
+
+from .aecGeometry import aecGeometry
+from .aecSpace import aecSpace
+
+"""
+class aecSpaceStack
+Represents a stack of identical aecSpaces as one footprint
+space and the levels of the copies stacked above it.
+"""
+class aecSpaceStack:
+    """
+    Reports the count, area, and volume of a stack analytically,
+    without creating an aecSpace for each floor. Floors are expanded
+    into full aecSpaces or a merged mesh only when requested.
+    The stack includes the delivered space as its lowest floor and
+    follows any later changes to its boundary, level, or height.
+    """
+
+    __slots__ = ['__copies', '__plenum', '__space']
+
+    def __init__(self, space: aecSpace, copies: int = 0, plenum: float = 0):
+        """
+        Constructor accepts the lowest floor, the count of copies
+        stacked above it, and the additional elevation between floors.
+        """
+        self.__copies = max(0, int(copies))
+        self.__plenum = float(plenum)
+        self.__space = space
+
+    @property
+    def area(self) -> float:
+        """
+        Property
+        Returns the aggregate floor area of the stack.
+        Returns None on failure.
+        """
+        try:
+            return self.__space.area * self.count
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    @property
+    def count(self) -> int:
+        """
+        Property
+        Returns the count of floors, including the lowest floor.
+        Returns None on failure.
+        """
+        try:
+            return self.__copies + 1
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    @property
+    def levels(self) -> numpy.ndarray:
+        """
+        Property
+        Returns an array of the level of each floor, lowest to highest.
+        Returns None on failure.
+        """
+        try:
+            return self.__space.level + self.offsets
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    @property
+    def mesh_arrays(self) -> aecGeometry.mesh3Darray:
+        """
+        Property
+        Returns a single mesh of all floors as contiguous float32 vertex
+        and normal arrays and a uint32 index array, repeating the mesh of
+        the lowest floor at each level.
+        Returns None on failure.
+        """
+        try:
+            mesh = self.__space.mesh_arrays
+            count = self.count
+            vertices = numpy.tile(mesh.vertices, (count, 1)).reshape(count, -1, 3)
+            vertices[:, :, 2] += self.offsets.astype(numpy.float32)[:, numpy.newaxis]
+            offsets = numpy.arange(count, dtype = numpy.uint32) * len(mesh.vertices)
+            indices = mesh.indices[numpy.newaxis] + offsets[:, numpy.newaxis, numpy.newaxis]
+            return aecGeometry.mesh3Darray(vertices = vertices.reshape(-1, 3),
+                                           indices = indices.reshape(-1, 3),
+                                           normals = numpy.tile(mesh.normals, (count, 1)))
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    @property
+    def offsets(self) -> numpy.ndarray:
+        """
+        Property
+        Returns an array of the elevation of each floor above the lowest floor.
+        Returns None on failure.
+        """
+        try:
+            return numpy.arange(self.count) * (self.__space.height + self.__plenum)
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    @property
+    def plenum(self) -> float:
+        """
+        Property
+        Returns the additional elevation between floors.
+        Returns None on failure.
+        """
+        try:
+            return self.__plenum
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    @property
+    def space(self) -> aecSpace:
+        """
+        Property
+        Returns the lowest floor.
+        Returns None on failure.
+        """
+        try:
+            return self.__space
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    @property
+    def spaces(self) -> List[aecSpace]:
+        """
+        Property
+        Returns a list of all floors, lowest to highest, as the lowest
+        floor followed by a new aecSpace for each floor above it.
+        Returns None on failure.
+        """
+        try:
+            spaces = [self.__space]
+            for offset in self.offsets[1:].tolist(): spaces.append(self.__space.clone(z = offset))
+            return spaces
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    @property
+    def volume(self) -> float:
+        """
+        Property
+        Returns the aggregate volume of the stack.
+        Returns None on failure.
+        """
+        try:
+            return self.__space.volume * self.count
+        except Exception:
+            traceback.print_exc()
+            return None
@@ -1,12 +1,15 @@
+import numpy
 import traceback
 
-from random import uniform
+import shapely as shapelyArray
 from shapely import geometry as shapely
 from typing import List
 
 from .aecGeometry import aecGeometry
 from .aecPoint import aecPoint
+from .aecRandom import aecRandom
 from .aecSpace import aecSpace
+from .aecSpaceStack import aecSpaceStack
 
 """
 class aecSpacer
@@ -17,6 +20,86 @@ class aecSpacer:
 
     __aecGeometry = aecGeometry()
 
+    def __init__(self):
+        """
+        Constructor records no placement trials.
+        """
+        self.__trials = 0
+
+    def __placeBatch(self, shape: aecSpace, border: aecSpace, rng: aecRandom, batch: int) -> bool:
+        """
+        Tests up to 100 random centroid positions for the shape within the border,
+        translating the shape's coordinate array to batch positions at a time
+        rather than moving a copy of the shape to each position.
+        Returns True on success.
+        Returns False on failure.
+        """
+        try:
+            bounds = border.boundary.bounds
+            centroid = shape.boundary.centroid
+            coords = numpy.asarray(shape.boundary.exterior.coords) - (centroid.x, centroid.y)
+            prepared = border.boundary_prepared.context
+            tries = 0
+            while tries < 100:
+                count = min(batch, 100 - tries)
+                offsets = numpy.column_stack((rng.uniformArray(bounds[0], bounds[2], count),
+                                              rng.uniformArray(bounds[1], bounds[3], count)))
+                candidates = shapelyArray.polygons(coords[numpy.newaxis, :, :] + 
+                                                   offsets[:, numpy.newaxis, :])
+                hits = numpy.flatnonzero(shapelyArray.contains(prepared, candidates))
+                if hits.size > 0:
+                    self.__trials += int(hits[0]) + 1
+                    xCoord, yCoord = offsets[hits[0]]
+                    return shape.moveTo(shape.centroid_floor, aecPoint(xCoord, yCoord, border.level))
+                tries += count
+                self.__trials += count
+            return False
+        except Exception:
+            traceback.print_exc()
+            return False
+
+    def __placeExact(self, shape: aecSpace, border: aecSpace, rng: aecRandom) -> bool:
+        """
+        Moves the shape's centroid to a random point of the region of centroid
+        positions at which the shape fits within the border, falling back to
+        a representative point of the region if random trials miss it.
+        Returns True on success.
+        Returns False if the shape cannot fit or on failure.
+        """
+        try:
+            centroid = shape.boundary.centroid
+            region = self.__aecGeometry.getErosion(border.boundary, shape.boundary, 
+                                                   (centroid.x, centroid.y))
+            if region is None or region.is_empty or region.area <= 0: return False
+            bounds = region.bounds
+            xCoords = rng.uniformArray(bounds[0], bounds[2], 100)
+            yCoords = rng.uniformArray(bounds[1], bounds[3], 100)
+            hits = numpy.flatnonzero(shapelyArray.contains_xy(region, xCoords, yCoords))
+            self.__trials += int(hits[0]) + 1 if hits.size > 0 else len(xCoords)
+            if hits.size > 0: 
+                point = aecPoint(xCoords[hits[0]], yCoords[hits[0]], border.level)
+            else:
+                point = region.representative_point()
+                point = aecPoint(point.x, point.y, border.level)
+            return shape.moveTo(shape.centroid_floor, point)
+        except Exception:
+            traceback.print_exc()
+            return False
+
+    @property
+    def trials(self) -> int:
+        """
+        Property
+        Returns the count of random positions tried by the most recent call
+        to placeWithin or placeOnLine, up to the first position that fit.
+        Returns None on failure.
+        """
+        try:
+            return self.__trials
+        except Exception:
+            traceback.print_exc()
+            return None
+
     def copy(self, space: aecSpace, x: float = 0, y: float = 0, z: float = 0) -> aecSpace:
         """
         Returns a new aecSpace that is a copy of the delivered aecSpace.
@@ -24,15 +107,7 @@ class aecSpacer:
         Returns None on failure.
         """
         try:
-            spcProps = space.copy_properties
-            newSpace = aecSpace()
-            newSpace.boundary = spcProps['boundary']            
-            newSpace.color = spcProps['color']
-            newSpace.height = spcProps['height']
-            newSpace.level = spcProps['level']
-            newSpace.name = spcProps['name']
-            newSpace.moveBy(x, y, z)
-            return newSpace
+            return space.clone(x, y, z)
         except Exception:
             traceback.print_exc() 
             return None
@@ -73,17 +148,21 @@ class aecSpacer:
             traceback.print_exc()
             return None
 
-    def placeOnLine(self, shape: aecSpace, border: aecSpace, orient: List[int]) -> bool:
+    def placeOnLine(self, shape: aecSpace, border: aecSpace, orient: List[int], rng = None) -> bool:
         """
         Attempts to place one aecSpace (shape) withn the boundary of
         another (border) at a random interior point along a specified line
         from the center of the boundary to the specified compass point on
         the boundary.
+        Random positions are drawn from the delivered seed, random.Random,
+        or numpy Generator, or from the random module if none is delivered.
         Returns True on success.
         Returns False on failure.        
         """
         try:
+            self.__trials = 0
             if shape.area > border.area: return False
+            rng = aecRandom(rng)
             tstShape = self.copy(shape)
             for direction in orient:
                 comLine = border.compassLine(direction)
@@ -92,12 +171,13 @@ class aecSpacer:
                 x = 0
                 while not within and x < 100:
                     vector = shapely.LineString([comLine[0].xy, comLine[1].xy])
-                    posit = uniform(0, 100)
+                    posit = rng.uniform(0, 100)
                     point = vector.interpolate(posit, normalized = True)
                     point = aecPoint(point.x, point.y, level)
                     tstShape.moveTo(tstShape.centroid_floor, point)
                     within = border.containsShape(tstShape.points_floor)
                     x += 1
+                    self.__trials += 1
                 if within: 
                     shape.moveTo(shape.centroid_floor, point)
                     return True
@@ -106,15 +186,26 @@ class aecSpacer:
             traceback.print_exc()
             return False        
 
-    def placeWithin(self, shape: aecSpace, border: aecSpace) -> bool:
+    def placeWithin(self, shape: aecSpace, border: aecSpace, rng = None, 
+                          batch: int = 0, exact: bool = False) -> bool:
         """
         Attempts to place one aecSpace (shape) within the boundary 
         of another (border) at a random interior point.
+        Random positions are drawn from the delivered seed, random.Random,
+        or numpy Generator, or from the random module if none is delivered.
+        If batch is positive, candidate positions are drawn batch at a time
+        as arrays and tested for containment in a single vectorized call.
+        If exact is True, the position is chosen from the computed region of 
+        all valid positions, so placement fails only if the shape cannot fit.
         Returns True on success.
         Returns False on failure.
         """
         try:
+            self.__trials = 0
             if shape.area > border.area: return False
+            rng = aecRandom(rng)
+            if exact: return self.__placeExact(shape, border, rng)
+            if batch > 0: return self.__placeBatch(shape, border, rng, int(batch))
             level = border.level
             xAxis = border.axis_x
             yAxis = border.axis_y        
@@ -126,12 +217,13 @@ class aecSpacer:
             x = 0
             tstShape = self.copy(shape)
             while not within and x < 100:
-                xCoord = uniform(lowX, topX)
-                yCoord = uniform(lowY, topY)
+                xCoord = rng.uniform(lowX, topX)
+                yCoord = rng.uniform(lowY, topY)
                 bndPnt = aecPoint(xCoord, yCoord, level)
                 tstShape.moveTo(tstShape.centroid_floor, bndPnt)
-                within = border.boundary.contains(tstShape.boundary)
+                within = border.boundary_prepared.contains(tstShape.boundary)
                 x += 1
+                self.__trials += 1
             if not within: return False
             shape.moveTo(shape.centroid_floor, bndPnt)
             return True
@@ -170,6 +262,36 @@ class aecSpacer:
             traceback.print_exc()
             return None
 
+    def stackPrism(self, space: aecSpace, copies: int = 1, plenum: float = 0) -> aecSpaceStack:
+        """
+        Returns an aecSpaceStack of the delivered aecSpace and the indicated
+        number of copies stacked upward by the height of the aecSpace plus
+        additional elevation added by the plenum parameter.
+        The stack includes the delivered aecSpace and creates no other spaces.
+        Returns None on failure.
+        """
+        try:
+            return aecSpaceStack(space, copies, plenum)
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    def stackPrismToArea(self, space: aecSpace, area: float, plenum: float = 0) -> aecSpaceStack:
+        """
+        Returns an aecSpaceStack of the delivered aecSpace with as many copies
+        as stackToArea would create to meet or exceed the target area.
+        The stack includes the delivered aecSpace and creates no other spaces.
+        Returns None on failure.
+        """
+        try:
+            spcArea = space.area
+            copies = 0
+            if spcArea < area: copies = int(area / spcArea)
+            return aecSpaceStack(space, copies, plenum)
+        except Exception:
+            traceback.print_exc()
+            return None
+
     def stackToArea(self, space, area, plenum = 0):
         """
         Compares the area of the delivered aecSpace to the target area and stacks
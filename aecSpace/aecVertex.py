@@ -30,7 +30,7 @@ class aecVertex():
         Constructor records the vertex point and three adjacent points 
         to calculate angles, convexity, and point normal of the vertex.
         """   
-        self.__ID = str(uuid4()) 
+        self.__ID = None
         self.__point = pnt
         angles = self.__aecGeometry.getAngles(pnt, pntPre, pntNxt)
         self.__angle_exterior = angles.exterior
@@ -102,9 +102,10 @@ class aecVertex():
     def ID(self) -> str:
         """
         Property
-        Returns the UUID.
+        Returns the UUID, generated on first request.
         """            
         try:
+            if not self.__ID: self.__ID = str(uuid4())
             return self.__ID
         except Exception:
             traceback.print_exc()
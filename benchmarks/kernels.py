@@ -0,0 +1,307 @@
+"""
+Benchmarks the aecSpace geometry kernels and end-to-end sitePlacement,
+recording the wall time, traced memory allocations, and count of shapely
+calls of each case to a JSON file that later runs can be compared against.
+
+    python benchmarks/kernels.py run [--output results.json] [--repeat 5] [--case aecSpace.rotate] [--quick]
+    python benchmarks/kernels.py compare before.json after.json [--threshold 0.1]
+
+Each case is timed in its own repeats, then run once more under tracemalloc
+and once more under a profiler counting the calls made from outside shapely
+into shapely, so neither measurement distorts the timings.
+Cases fall back to the earlier API of a revision that lacks a newer one,
+such as stackToArea for stackPrismToArea, so results of any two revisions
+can be compared.
+"""
+
+import argparse
+import inspect
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+rootPath = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if rootPath not in sys.path: sys.path.insert(0, rootPath)
+
+import numpy
+import shapely
+
+from aecSpace.aecFloor import aecFloor
+from aecSpace.aecGeometry import aecGeometry
+from aecSpace.aecPoint import aecPoint
+from aecSpace.aecShaper import aecShaper
+from aecSpace.aecSpace import aecSpace
+from aecSpace.aecSpacer import aecSpacer
+
+import SitePlacement
+
+shapelyPath = os.path.dirname(os.path.abspath(shapely.__file__))
+
+# Each case returns the callable to measure and the number of calls per timed sample.
+
+def caseConstruct():
+    points = aecShaper().makeL(aecPoint(0, 0), xSize = 200, ySize = 150)
+    def run():
+        space = aecSpace()
+        space.boundary = points
+    return run, 200
+
+def caseFromArray():
+    return lambda: makeBox(300, 250), 2000
+
+def caseMoveBy():
+    space = makeSpace()
+    return lambda: space.moveBy(1, 1, 0), 500
+
+def caseRotate():
+    space = makeSpace()
+    return lambda: space.rotate(7), 500
+
+def caseGetMesh2D():
+    geometry = aecGeometry()
+    points = aecShaper().makeCross(aecPoint(0, 0), xSize = 200, ySize = 150)
+    clearCache = getattr(geometry, 'clearTriangleCache', lambda: None)
+    def run():
+        clearCache()
+        geometry.getMesh2D(points)
+    return run, 500
+
+def caseMeshGraphic():
+    space = makeSpace()
+    space.mesh_graphic
+    copy = getattr(space, 'clone', lambda: aecSpacer().copy(space))
+    return lambda: copy().mesh_graphic, 500
+
+def casePlaceWithin():
+    site = SitePlacement.makeSite()
+    building = makeBox(300, 250)
+    building.rotate(60)
+    spacer = aecSpacer()
+    args = []
+    kwargs = {}
+    if hasParameter(spacer.placeWithin, 'rng'): args.append(random.Random(1))
+    else: random.seed(1)
+    if hasParameter(spacer.placeWithin, 'exact'): kwargs['exact'] = True
+    return lambda: spacer.placeWithin(building, site, *args, **kwargs), 50
+
+def caseStackToArea():
+    spacer = aecSpacer()
+    space = makeSpace()
+    return lambda: spacer.stackToArea(space, space.area * 40), 50
+
+def caseStackPrismToArea():
+    spacer = aecSpacer()
+    space = makeSpace()
+    stack = getattr(spacer, 'stackPrismToArea', spacer.stackToArea)
+    return lambda: stack(space, space.area * 40), 50
+
+def caseMakeI():
+    boundary = aecShaper().makeBox(aecPoint(0, 0), 30000, 20000)
+    def run():
+        floor = aecFloor()
+        floor.floor.boundary = boundary
+        floor.makeI(roomsWest = 8, roomsEast = 8, roomsNorth = 2, roomsSouth = 1)
+    return run, 5
+
+def caseSitePlacementGrid(stride: int = 1):
+    params = siteGrid()[::stride]
+    if hasattr(SitePlacement, 'sitePlacementBatch'):
+        for index, param in enumerate(params): param['seed'] = index
+        def run():
+            for result in SitePlacement.sitePlacementBatch(params): pass
+    else:
+        def run():
+            for index, param in enumerate(params):
+                random.seed(index)
+                SitePlacement.sitePlacement(**param)
+    return run, 1
+
+def hasParameter(function, name: str) -> bool:
+    return name in inspect.signature(function).parameters
+
+def makeBox(length: float, width: float) -> aecSpace:
+    if hasattr(aecSpace, 'fromArray'): 
+        return aecSpace.fromArray([(0, 0), (length, 0), (length, width), (0, width)])
+    space = aecSpace()
+    space.boundary = aecShaper().makeBox(aecPoint(0, 0), xSize = length, ySize = width)
+    return space
+
+def makeSpace():
+    space = aecSpace()
+    space.boundary = aecShaper().makeL(aecPoint(0, 0), xSize = 200, ySize = 150)
+    space.height = 25
+    return space
+
+def siteGrid() -> list:
+    """
+    Returns every parameter combination of the min/max/step grid declared in
+    hypar.json, read here so revisions without sitePlacementGrid use the same grid.
+    """
+    with open(os.path.join(rootPath, 'hypar.json')) as file: parameters = json.load(file)['parameters']
+    names = ('length', 'width', 'height', 'rotation', 'area')
+    axes = []
+    for name in names:
+        bounds = parameters[name]
+        axes.append(list(numpy.arange(bounds['min'], bounds['max'] + bounds['step'] / 2, bounds['step']).tolist()))
+    return [dict(zip(names, values)) for values in itertools.product(*axes)]
+
+benchCases = \
+{
+    'aecSpace.construct': caseConstruct,
+    'aecSpace.fromArray': caseFromArray,
+    'aecSpace.moveBy': caseMoveBy,
+    'aecSpace.rotate': caseRotate,
+    'aecGeometry.getMesh2D': caseGetMesh2D,
+    'aecSpace.mesh_graphic': caseMeshGraphic,
+    'aecSpacer.placeWithin': casePlaceWithin,
+    'aecSpacer.stackToArea': caseStackToArea,
+    'aecSpacer.stackPrismToArea': caseStackPrismToArea,
+    'aecFloor.makeI': caseMakeI,
+    'sitePlacement.grid': caseSitePlacementGrid,
+}
+
+def countShapelyCalls(function) -> int:
+    """
+    Returns the count of calls from outside shapely into shapely
+    functions, whether written in Python or C, made by one call.
+    """
+    calls = [0]
+    def inShapely(frame):
+        return frame is not None and frame.f_code.co_filename.startswith(shapelyPath)
+    def profile(frame, event, arg):
+        if event == 'call':
+            if inShapely(frame) and not inShapely(frame.f_back): calls[0] += 1
+        elif event == 'c_call':
+            module = getattr(arg, '__module__', None) or ''
+            if module.startswith('shapely') and not inShapely(frame): calls[0] += 1
+    sys.setprofile(profile)
+    try: function()
+    finally: sys.setprofile(None)
+    return calls[0]
+
+def measureAllocations(function) -> dict:
+    """
+    Returns the peak and retained bytes traced by tracemalloc during one call.
+    """
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        function()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'peak_bytes': peak - before, 'retained_bytes': current - before}
+
+def measureCase(name: str, repeat: int = 5, quick: bool = False) -> dict:
+    if name == 'sitePlacement.grid' and quick: function, number = caseSitePlacementGrid(24)
+    else: function, number = benchCases[name]()
+    function()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number): function()
+        samples.append((time.perf_counter() - start) / number)
+    result = \
+    {
+        'number': number,
+        'repeat': repeat,
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'mean': statistics.mean(samples),
+    }
+    result.update(measureAllocations(function))
+    result['shapely_calls'] = countShapelyCalls(function)
+    return result
+
+def gitRevision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd = rootPath,
+                              check = True, capture_output = True, text = True).stdout.strip()
+    except Exception:
+        return None
+
+def runSuite(names = None, repeat: int = 5, quick: bool = False) -> dict:
+    names = names or list(benchCases)
+    return \
+    {
+        'revision': gitRevision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': numpy.__version__,
+        'shapely': shapely.__version__,
+        'quick': quick,
+        'results': {name: measureCase(name, repeat, quick) for name in names},
+    }
+
+def compareSuites(before: dict, after: dict, threshold: float = 0.1) -> list:
+    """
+    Returns a row for each case present in both results, with the ratio of
+    the fastest samples, the least disturbed by other load on the machine,
+    and whether the slowdown exceeds the threshold.
+    """
+    rows = []
+    for name, new in after['results'].items():
+        old = before['results'].get(name)
+        if old is None: continue
+        ratio = new['min'] / old['min'] if old['min'] else float('inf')
+        rows.append(
+        {
+            'name': name,
+            'before': old['min'],
+            'after': new['min'],
+            'ratio': ratio,
+            'peak_bytes': (old['peak_bytes'], new['peak_bytes']),
+            'shapely_calls': (old['shapely_calls'], new['shapely_calls']),
+            'regressed': ratio > 1 + threshold,
+        })
+    return rows
+
+def formatSeconds(seconds: float) -> str:
+    if seconds >= 1: return '{:.3f} s'.format(seconds)
+    if seconds >= 1e-3: return '{:.3f} ms'.format(seconds * 1e3)
+    return '{:.1f} us'.format(seconds * 1e6)
+
+def main(args = None):
+    parser = argparse.ArgumentParser(description = 'Benchmark the aecSpace geometry kernels.')
+    commands = parser.add_subparsers(dest = 'command', required = True)
+    run = commands.add_parser('run', help = 'Run the benchmark cases and save the results.')
+    run.add_argument('--output', default = None)
+    run.add_argument('--repeat', type = int, default = 5)
+    run.add_argument('--case', action = 'append', choices = list(benchCases))
+    run.add_argument('--quick', action = 'store_true', help = 'Place every 24th grid point only.')
+    compare = commands.add_parser('compare', help = 'Compare two saved results.')
+    compare.add_argument('before')
+    compare.add_argument('after')
+    compare.add_argument('--threshold', type = float, default = 0.1)
+    options = parser.parse_args(args)
+    if options.command == 'run':
+        suite = runSuite(options.case, options.repeat, options.quick)
+        for name, result in suite['results'].items():
+            print('{:<28} {:>12} median {:>12} min {:>12,} peak bytes {:>8,} shapely calls'.format(
+                  name, formatSeconds(result['median']), formatSeconds(result['min']),
+                  result['peak_bytes'], result['shapely_calls']))
+        if options.output:
+            with open(options.output, 'w') as file: json.dump(suite, file, indent = 2)
+        return suite
+    with open(options.before) as file: before = json.load(file)
+    with open(options.after) as file: after = json.load(file)
+    rows = compareSuites(before, after, options.threshold)
+    for row in rows:
+        print('{:<28} {:>12} -> {:>12} {:>6.2f}x  peak {:,} -> {:,}  shapely {} -> {}{}'.format(
+              row['name'], formatSeconds(row['before']), formatSeconds(row['after']), row['ratio'],
+              row['peak_bytes'][0], row['peak_bytes'][1],
+              row['shapely_calls'][0], row['shapely_calls'][1],
+              '  REGRESSED' if row['regressed'] else ''))
+    if any(row['regressed'] for row in rows): sys.exit(1)
+    return rows
+
+if __name__ == '__main__':
+    main()
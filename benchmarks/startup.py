@@ -0,0 +1,59 @@
+"""
+Measures the cold start cost of a hypar function by importing SitePlacement
+in fresh interpreters, reporting the wall time of each import and whether
+any optional heavyweight modules were loaded along the way.
+
+    python benchmarks/startup.py [--runs 10] [--module SitePlacement]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+rootPath = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+startupScript = \
+"""
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+optional = sorted({{name.split('.')[0] for name in sys.modules}} & {{'matplotlib', 'scipy', 'pandas'}})
+print(json.dumps({{'seconds': elapsed, 'modules': len(sys.modules), 'optional': optional}}))
+"""
+
+def measureImport(module: str = 'SitePlacement'):
+    script = startupScript.format(module = module)
+    output = subprocess.run([sys.executable, '-c', script], cwd = rootPath,
+                            check = True, capture_output = True, text = True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def measureStartup(module: str = 'SitePlacement', runs: int = 10):
+    samples = [measureImport(module) for _ in range(runs)]
+    seconds = [sample['seconds'] for sample in samples]
+    return \
+    {
+        'module': module,
+        'runs': runs,
+        'min': min(seconds),
+        'median': statistics.median(seconds),
+        'max': max(seconds),
+        'modules': samples[-1]['modules'],
+        'optional': samples[-1]['optional'],
+    }
+
+def main(args = None):
+    parser = argparse.ArgumentParser(description = 'Measure the import time of a module in fresh interpreters.')
+    parser.add_argument('--module', default = 'SitePlacement')
+    parser.add_argument('--runs', type = int, default = 10)
+    options = parser.parse_args(args)
+    result = measureStartup(options.module, options.runs)
+    print('import {module}: min {min:.3f}s, median {median:.3f}s, max {max:.3f}s over {runs} runs'.format(**result))
+    print('{} modules loaded; optional modules loaded: {}'.format(result['modules'], ', '.join(result['optional']) or 'none'))
+    return result
+
+if __name__ == '__main__':
+    main()
@@ -1 +1,2 @@
-from .test_site_placement import *
\ No newline at end of file
+from .test_site_placement import *
+from .test_aec_space import *
\ No newline at end of file
@@ -0,0 +1,350 @@
+import io
+import json
+import numpy
+import struct
+import unittest
+
+from shapely import geometry as shapely
+
+from aecSpace.aecColor import aecColor
+from aecSpace.aecGeometry import aecGeometry
+from aecSpace.aecPoint import aecPoint
+from aecSpace.aecShaper import aecShaper
+from aecSpace.aecSpace import aecSpace
+from aecSpace.aecSpaceGLTF import aecSpaceGLTF
+from aecSpace.aecSpaceGroup import aecSpaceGroup
+from aecSpace.aecSpacer import aecSpacer
+
+from SitePlacement import makeSite
+
+class TestAecPoint(unittest.TestCase):
+    def test_lazy_id(self):
+        point = aecPoint(1, 2, 3)
+        self.assertEqual(point.ID, point.ID)
+        self.assertNotEqual(point.ID, aecPoint(1, 2, 3).ID)
+        space = aecSpace()
+        self.assertEqual(space.ID, space.ID)
+
+class TestAecSpace(unittest.TestCase):
+    def test_prepared_boundary(self):
+        space = aecSpace()
+        prepared = space.boundary_prepared
+        self.assertIs(prepared, space.boundary_prepared)
+        self.assertTrue(space.containsPoint(aecPoint(0.5, 0.5)))
+        space.moveBy(x = 10)
+        self.assertIsNot(prepared, space.boundary_prepared)
+        self.assertFalse(space.containsPoint(aecPoint(0.5, 0.5)))
+        self.assertTrue(space.containsPoint(aecPoint(10.5, 0.5)))
+        self.assertTrue(space.enclosesPoint(aecPoint(10.5, 0.5, 0.5)))
+
+    def test_cached_properties(self):
+        space = aecSpace()
+        version = space.version
+        mesh = space.mesh_arrays
+        self.assertIs(mesh, space.mesh_arrays)
+        self.assertFalse(mesh.vertices.flags.writeable)
+        space.center_floor.moveBy(x = 5)
+        space.points_floor[1].moveBy(y = 9)
+        space.mesh_graphic.vertices.clear()
+        space.normal_sides.clear()
+        self.assertEqual(space.center_floor.xyz, (0.5, 0.5, 0))
+        self.assertEqual(space.points_floor[1].xyz, (1, 0, 0))
+        self.assertEqual(len(space.mesh_graphic.vertices), len(mesh.vertices) * 3)
+        self.assertEqual(len(space.normal_sides), 4)
+        space.height = 3
+        self.assertGreater(space.version, version)
+        self.assertEqual(space.points_ceiling[0].z, 3)
+        space.moveBy(x = 2, z = 1)
+        self.assertIsNot(mesh, space.mesh_arrays)
+        self.assertEqual(space.points_box.SW.xyz, (2, 0, 1))
+        self.assertEqual(space.center_ceiling.z, 4)
+        self.assertEqual(space.center_floor.z, 1)
+
+    def test_coordinate_transforms(self):
+        space = aecSpace()
+        space.boundary = aecShaper().makeBox(aecPoint(0, 0, 0), xSize = 4, ySize = 2)
+        space.mirror([aecPoint(5, 0), aecPoint(5, 1)])
+        self.assertEqual(space.coords_floor.tolist(), [[10, 0], [10, 2], [6, 2], [6, 0]])
+        self.assertTrue(space.boundary.exterior.is_ccw)
+        space.scale(x = -1, point = aecPoint(0, 0))
+        self.assertEqual(space.coords_floor.tolist(), [[-10, 0], [-6, 0], [-6, 2], [-10, 2]])
+        self.assertTrue(space.boundary.exterior.is_ccw)
+        space.moveBy(10, 1, 2)
+        self.assertEqual(space.points_floor[0].xyz, (0, 1, 2))
+        self.assertFalse(space.coords_floor.flags.writeable)
+        self.assertTrue(space.convex)
+
+    def test_clone(self):
+        space = aecSpace()
+        space.boundary = aecShaper().makeL(aecPoint(0, 0, 0), xSize = 20, ySize = 20)
+        space.color = aecColor.blue
+        space.height = 3
+        space.name = 'L'
+        same = space.clone()
+        self.assertIs(same.coords_floor, space.coords_floor)
+        self.assertIs(same.boundary, space.boundary)
+        copy = aecSpacer().copy(space, 5, 0, 2)
+        self.assertEqual(copy.coords_floor.tolist(), (space.coords_floor + (5, 0)).tolist())
+        self.assertEqual(copy.boundary.bounds, (5, 0, 25, 20))
+        self.assertEqual((copy.level, copy.height, copy.name), (2, 3, 'L'))
+        self.assertEqual(copy.color.color, aecColor.blue)
+        self.assertNotEqual(copy.ID, space.ID)
+        self.assertAlmostEqual(copy.volume, space.volume)
+        copy.moveBy(x = 1)
+        self.assertEqual(space.boundary.bounds, (0, 0, 20, 20))
+
+    def test_from_arrays(self):
+        space = aecSpace.fromArray([(0, 0), (0, 2), (2, 2), (2, 1), (2, 0), (0, 0)], level = 3, height = 2)
+        self.assertEqual(space.coords_floor.tolist(), [[0, 0], [2, 0], [2, 2], [0, 2]])
+        self.assertTrue(space.boundary.exterior.is_ccw)
+        self.assertEqual((space.level, space.height, space.area), (3, 2, 4))
+        polygon = shapely.Polygon([(0, 0), (3, 0), (3, 1), (0, 1)])
+        self.assertIs(aecSpace.fromPolygon(polygon).boundary, polygon)
+        rooms = numpy.array([[(0, 0), (1, 0), (1, 1), (0, 1)],
+                             [(0, 0), (0, 1), (1, 1), (1, 0)],
+                             [(0, 0), (1, 0), (2, 0), (0, 1)]], dtype = float)
+        spaces = aecSpace.fromArrays(rooms + [[[0, 0]], [[2, 0]], [[4, 0]]])
+        self.assertEqual([space.area for space in spaces], [1, 1, 1])
+        self.assertEqual(spaces[1].coords_floor.tolist(), [[2, 0], [3, 0], [3, 1], [2, 1]])
+        self.assertEqual(len(spaces[2].coords_floor), 3)
+        self.assertTrue(all(space.convex for space in spaces))
+        self.assertIsNone(aecSpace.fromArray([(0, 0), (1, 1), (2, 2)]))
+
+    def test_concave_mesh(self):
+        space = aecSpace()
+        space.boundary = aecShaper().makeU(aecPoint(0, 0, 0), xSize = 30, ySize = 20, xWidth1 = 10, xWidth2 = 10, yDepth = 10)
+        coords = space.coords_floor
+        triangles = space.mesh_floor.indices
+        self.assertEqual(len(triangles), len(coords) - 2)
+        edges1 = coords[[t[1] for t in triangles]] - coords[[t[0] for t in triangles]]
+        edges2 = coords[[t[2] for t in triangles]] - coords[[t[0] for t in triangles]]
+        area = numpy.abs(edges1[:, 0] * edges2[:, 1] - edges1[:, 1] * edges2[:, 0]).sum() / 2
+        self.assertAlmostEqual(area, space.area)
+
+    def test_mesh_arrays(self):
+        space = aecSpace()
+        space.boundary = aecShaper().makeL(aecPoint(0, 0, 0), xSize = 20, ySize = 20)
+        space.level = 2
+        space.height = 3
+        count = len(space.coords_floor)
+        mesh = space.mesh_arrays
+        self.assertEqual(mesh.vertices.dtype, numpy.float32)
+        self.assertEqual(mesh.indices.dtype, numpy.uint32)
+        self.assertEqual(mesh.vertices.shape, (6 * count, 3))
+        self.assertEqual(mesh.indices.shape, (4 * count - 4, 3))
+        self.assertTrue(mesh.vertices.flags.c_contiguous)
+        self.assertEqual(mesh.vertices[:, 2].min(), 2)
+        self.assertEqual(mesh.vertices[:, 2].max(), 5)
+        graphic = space.mesh_graphic
+        self.assertEqual(graphic.indices, mesh.indices.ravel().tolist())
+        self.assertTrue(numpy.allclose(graphic.vertices, mesh.vertices.ravel()))
+
+    def test_triangle_cache(self):
+        geometry = aecGeometry()
+        geometry.clearTriangleCache()
+        space = aecSpace()
+        space.boundary = aecShaper().makeL(aecPoint(0.1, 0.3, 0), xSize = 33.3, ySize = 27.1)
+        rooms = [space] + aecSpacer().row(space, 20)
+        meshes = [room.mesh_arrays for room in rooms]
+        info = geometry.getTriangleCacheInfo()
+        self.assertEqual((info['hits'], info['misses'], info['size']), (20, 1, 1))
+        for room, mesh in zip(rooms, meshes):
+            self.assertTrue(numpy.array_equal(mesh.indices, meshes[0].indices))
+            self.assertTrue(numpy.allclose(mesh.vertices[:len(room.coords_floor), :2], room.coords_floor))
+        self.assertFalse(geometry.getTriangles(space.coords_floor).flags.writeable)
+        geometry.clearTriangleCache()
+        coords = numpy.array([(0, 0), (40000, 0), (40000, 30000), (20000, 10000.0), (0, 30000)]) + 500000
+        geometry.getTriangles(coords)
+        coords[3, 1] += 1e-6
+        geometry.getTriangles(coords)
+        geometry.getTriangles(coords * 2)
+        self.assertIsNone(geometry.getTriangles(numpy.array([(0, 0), (1, 1), (2, 2.0)])))
+        info = geometry.getTriangleCacheInfo()
+        self.assertEqual((info['hits'], info['misses'], info['size']), (1, 3, 2))
+
+class TestAecSpaceGroup(unittest.TestCase):
+    def makeGroup(self):
+        shaper = aecShaper()
+        group = aecSpaceGroup()
+        for index in range(6):
+            space = aecSpace()
+            if index % 2: space.boundary = shaper.makeL(aecPoint(index * 30, 0), xSize = 20, ySize = 20)
+            else: space.boundary = shaper.makeBox(aecPoint(index * 30, 0), xSize = 20, ySize = 10)
+            space.height = index + 1
+            group.add([space])
+        return group
+
+    def test_adjacency(self):
+        group = aecSpaceGroup()
+        for x, y in [(0, 0), (10, 0), (20, 10), (0, 10)]:
+            space = aecSpace()
+            space.boundary = aecShaper().makeBox(aecPoint(x, y), xSize = 10, ySize = 10)
+            group.add([space])
+        self.assertEqual(group.adjacency(), {0: [1, 3], 1: [0], 2: [], 3: [0]})
+        self.assertEqual(group.adjacency(tolerance = 1), {0: [1, 3], 1: [0, 2, 3], 2: [1], 3: [0, 1]})
+        polygons = [space.boundary for space in group.spaces]
+        self.assertEqual(aecGeometry().getNeighbors(polygons[0], polygons[1:]), [0, 2])
+        self.assertEqual(aecGeometry().getNeighbors(polygons[1], polygons, tolerance = 1), [0, 1, 2, 3])
+        group.spaces[3].level = 5
+        self.assertEqual(group.adjacency(), {0: [1], 1: [0], 2: [], 3: []})
+
+    def test_neighbors_reach(self):
+        geometry = aecGeometry()
+        corridor = shapely.box(0, 0, 100, 100)
+        polygons = [shapely.box(100, 100, 150, 150), shapely.box(-100, -100, 200, 200), 
+                    shapely.box(40, 40, 60, 60), shapely.box(0, 130, 100, 150)]
+        self.assertEqual(geometry.getNeighbors(corridor, polygons, tolerance = 20), [0, 1, 2])
+        self.assertEqual(geometry.getNeighbors(corridor, polygons, tolerance = 20, length = 0), [0])
+        self.assertEqual(geometry.getAdjacency([corridor] + polygons, tolerance = 20, length = None)[0], [1, 2, 3])
+
+    def test_columnar_store(self):
+        group = self.makeGroup()
+        spaces = group.spaces
+        self.assertEqual(group.offsets[-1], len(group.coords))
+        self.assertAlmostEqual(group.area, sum(space.area for space in spaces))
+        self.assertAlmostEqual(group.volume, sum(space.volume for space in spaces))
+        spaces[0].height = 10
+        self.assertEqual(group.heights[0], 10)
+        group.setLevel(2)
+        group.moveBy(1, 2, 3)
+        self.assertEqual(group.levels.tolist(), [5] * 6)
+        self.assertEqual(spaces[1].level, 5)
+        self.assertEqual(spaces[0].coords_floor[0].tolist(), [1, 2])
+        self.assertEqual(spaces[0].boundary.bounds, (1, 2, 21, 12))
+        self.assertEqual(group.coords[0].tolist(), [1, 2])
+
+    def test_columnar_tracking(self):
+        group = self.makeGroup()
+        other = aecSpaceGroup()
+        other.add(group.spaces[:2])
+        coords = group.coords
+        self.assertIs(group.coords, coords)
+        self.assertEqual(len(other.coords), group.offsets[2])
+        group.spaces[1].moveBy(x = 1)
+        self.assertIsNot(group.coords, coords)
+        self.assertEqual(other.coords.tolist(), group.coords[:len(other.coords)].tolist())
+        group.moveBy(y = 1)
+        coords = group.coords
+        self.assertIs(group.coords, coords)
+        self.assertEqual(other.coords[0].tolist(), [0, 1])
+        group.spaces[0].level = 3
+        self.assertEqual(group.levels[0], 3)
+        group.add([aecSpace()])
+        self.assertEqual(len(group.levels), 7)
+        group.spaces.pop()
+        self.assertEqual(len(group.levels), 6)
+
+    def test_columnar_rotate(self):
+        group = self.makeGroup()
+        single = self.makeGroup()
+        group.rotate(30)
+        for space in single.spaces: space.rotate(30)
+        for one, two in zip(group.spaces, single.spaces):
+            self.assertEqual(one.coords_floor.tolist(), two.coords_floor.tolist())
+            self.assertTrue(one.boundary.equals(two.boundary))
+
+    def test_spatial_index(self):
+        group = self.makeGroup()
+        spaces = group.spaces
+        self.assertEqual(group.spacesAt(aecPoint(35, 5)), [spaces[1]])
+        self.assertEqual(group.spacesAt(aecPoint(25, 5)), [])
+        self.assertEqual(group.spacesIntersecting([aecPoint(15, 0), aecPoint(65, 0), 
+                                                   aecPoint(65, 5), aecPoint(15, 5)]), spaces[:3])
+        self.assertEqual(group.nearest(aecPoint(105, 5), 3), [spaces[3], spaces[4], spaces[2]])
+        group.setLevel(0)
+        spaces[4].level = 10
+        self.assertEqual(group.nearest(aecPoint(105, 5), 2, levels = (0, 0.5)), [spaces[3], spaces[2]])
+        group.moveBy(x = 1000)
+        self.assertEqual(group.spacesAt(aecPoint(35, 5)), [])
+        self.assertEqual(group.spacesAt(aecPoint(1035, 5)), [spaces[1]])
+        self.assertEqual(group.spacesIntersecting(spaces[4], 'overlaps'), [])
+
+class TestAecSpaceGLTF(unittest.TestCase):
+    def test_merged_spaces(self):
+        group = aecSpaceGroup()
+        for index in range(5):
+            space = aecSpace()
+            space.moveBy(x = index * 2)
+            space.color = aecColor.blue if index % 2 else aecColor.orange
+            group.add([space])
+        model = aecSpaceGLTF()
+        self.assertEqual(len(model.addSpaces(group)), 2)
+        glb = model.getGLB()
+        self.assertEqual(glb[:4], b'glTF')
+        self.assertEqual(struct.unpack('<I', glb[8:12])[0], len(glb))
+        stream = io.BytesIO()
+        self.assertEqual(model.write(stream), len(glb))
+        self.assertEqual(stream.getvalue(), glb)
+        length = struct.unpack('<I', glb[12:16])[0]
+        gltf = json.loads(glb[20:20 + length])
+        self.assertEqual(len(gltf['meshes']), 2)
+        self.assertEqual(len(gltf['materials']), 2)
+        self.assertEqual(len(gltf['bufferViews']), 6)
+        positions = [gltf['accessors'][mesh['primitives'][0]['attributes']['POSITION']] for mesh in gltf['meshes']]
+        self.assertEqual(sorted(position['count'] for position in positions), [48, 72])
+        self.assertEqual(positions[0]['max'][0], 9)
+
+class TestAecSpacer(unittest.TestCase):
+    def makeBuilding(self, length: float = 300, width: float = 250, rotation: float = 60):
+        building = aecSpace()
+        building.boundary = aecShaper().makeBox(aecPoint(0, 0, 0), xSize = length, ySize = width)
+        building.rotate(rotation)
+        return building
+
+    def test_stack_prism(self):
+        building = self.makeBuilding(100, 50, 0)
+        building.height = 4
+        stack = aecSpacer().stackPrismToArea(building, 22000, plenum = 1)
+        floors = aecSpacer().stackToArea(building, 22000, plenum = 1)
+        self.assertEqual(stack.count, len(floors) + 1)
+        self.assertEqual(stack.area, 25000)
+        self.assertEqual(stack.volume, 100000)
+        self.assertEqual(stack.levels.tolist(), [0, 5, 10, 15, 20])
+        spaces = stack.spaces
+        self.assertIs(spaces[0], building)
+        self.assertEqual([space.level for space in spaces[1:]], [floor.level for floor in floors])
+        mesh = stack.mesh_arrays
+        self.assertEqual(len(mesh.vertices), 5 * len(building.mesh_arrays.vertices))
+        self.assertEqual(mesh.vertices[:, 2].max(), 24)
+        self.assertEqual(int(mesh.indices.max()), len(mesh.vertices) - 1)
+
+    def test_place_within_seed(self):
+        site = makeSite()
+        one = self.makeBuilding()
+        two = self.makeBuilding()
+        self.assertTrue(aecSpacer().placeWithin(one, site, 11))
+        self.assertTrue(aecSpacer().placeWithin(two, site, 11))
+        self.assertEqual([pnt.xy for pnt in one.points_floor], 
+                         [pnt.xy for pnt in two.points_floor])
+        self.assertTrue(site.containsShape(one.points_floor))
+
+    def test_place_within_batch(self):
+        site = makeSite()
+        one = self.makeBuilding(400, 300)
+        two = self.makeBuilding(400, 300)
+        self.assertTrue(aecSpacer().placeWithin(one, site, 11, batch = 25))
+        self.assertTrue(aecSpacer().placeWithin(two, site, 11, batch = 25))
+        self.assertEqual(one.boundary.centroid.coords[0], two.boundary.centroid.coords[0])
+        self.assertEqual(one.level, site.level)
+        self.assertTrue(site.boundary.contains(one.boundary))
+
+    def test_place_within_exact(self):
+        site = makeSite()
+        building = self.makeBuilding(700, 500, 0)
+        spacer = aecSpacer()
+        self.assertEqual(spacer.trials, 0)
+        self.assertTrue(spacer.placeWithin(building, site, 3, exact = True))
+        self.assertTrue(site.boundary.contains(building.boundary))
+        self.assertTrue(1 <= spacer.trials <= 100)
+        self.assertFalse(aecSpacer().placeWithin(self.makeBuilding(900, 900, 0), site, 
+                                                 exact = True))
+
+    def test_random_point_seed(self):
+        site = makeSite()
+        point = site.randomPoint(rng = 5)
+        self.assertEqual(point.xyz, site.randomPoint(rng = 5).xyz)
+        self.assertTrue(site.containsPoint(point))
+        self.assertEqual(site.randomPoint(ceiling = True, rng = 5).z, site.elevation)
+
+if __name__ == '__main__':
+    unittest.main()
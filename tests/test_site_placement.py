@@ -1,15 +1,163 @@
+import base64
+import importlib.util
+import io
+import json
 import os
+import random
+import sqlite3
+import struct
+import subprocess
 import sys
+import tempfile
+
+import numpy
+
 import unittest
 sys.path.append("../SitePlacement")
-from SitePlacement import sitePlacement
+from aecSpace.aecResultCache import aecResultCache
+from SitePlacement import placementCache, sitePlacement, sitePlacementBatch, sitePlacementGrid, sitePlacementSweep, sweepSeed
 
 class TestSitePlacement(unittest.TestCase):
     def test_site_placement(self):
-        result = sitePlacement()
-        self.assertIsNotNone(result['model'])
-        self.assertIsNotNone(result['floors'])
-        self.assertIsNotNone(result['area'])
+        result = sitePlacement(length = 300, width = 250, height = 25, rotation = 60, area = 100000, seed = 3)
+        self.assertEqual(set(result), {'model', 'computed'})
+        self.assertGreater(result['computed']['floors'], 0)
+        self.assertGreater(result['computed']['area'], 0)
+        model = base64.b64decode(result['model'])
+        self.assertEqual(model[:4], b'glTF')
+        self.assertEqual(struct.unpack('<I', model[8:12])[0], len(model))
+
+    def test_site_placement_grid(self):
+        grid = list(sitePlacementGrid())
+        self.assertEqual(len(grid), 720)
+        self.assertEqual(grid[0], {'length': 200, 'width': 200, 'height': 20, 
+                                   'rotation': 0, 'area': 80000})
+
+    def test_site_placement_batch(self):
+        params = list(sitePlacementGrid())[::240]
+        random.seed(1)
+        single = [sitePlacement(**param) for param in params]
+        random.seed(1)
+        batch = list(sitePlacementBatch(params))
+        self.assertEqual(len(batch), len(params))
+        for one, many in zip(single, batch):
+            self.assertEqual(one['computed'], many['computed'])
+            self.assertEqual(len(one['model']), len(many['model']))
+
+    def test_site_placement_sweep(self):
+        params = list(sitePlacementGrid())[::60]
+        ordered = list(sitePlacementSweep(params, workers = 2, chunksize = 3, seed = 7))
+        unordered = sorted(sitePlacementSweep(params, workers = 2, chunksize = 3, 
+                                              ordered = False, seed = 7),
+                           key = lambda item: item[0])
+        self.assertEqual([item[0] for item in ordered], list(range(len(params))))
+        for one, two in zip(ordered, unordered):
+            self.assertEqual(one[1], two[1])
+        index = 5
+        single = sitePlacement(**params[index], seed = sweepSeed(7, index))
+        self.assertEqual(single, ordered[index][1])
+
+    def test_site_placement_seed(self):
+        param = {'length': 300, 'width': 250, 'height': 25, 'rotation': 60, 'area': 100000}
+        self.assertEqual(sitePlacement(**param, seed = 3), sitePlacement(**param, seed = 3))
+        self.assertEqual(sitePlacement(**param, seed = random.Random(3)), 
+                         sitePlacement(**param, seed = 3))
+        self.assertEqual(sitePlacement(**param, seed = numpy.random.default_rng(3)), 
+                         sitePlacement(**param, seed = numpy.random.default_rng(3)))
+
+    def test_site_placement_cache(self):
+        param = {'length': 300, 'width': 250, 'height': 25, 'rotation': 60, 'area': 100000}
+        with tempfile.TemporaryDirectory() as folder:
+            cache = placementCache(os.path.join(folder, 'cache.db'))
+            result = sitePlacement(**param, seed = 3, cache = cache)
+            self.assertEqual(result, sitePlacement(**param, seed = 3))
+            self.assertEqual(sitePlacement(**param, seed = 3, cache = cache), result)
+            self.assertEqual((cache.hits, cache.misses, cache.count), (1, 1, 1))
+            sitePlacement(**param, cache = cache)
+            self.assertEqual((cache.hits, cache.misses, cache.count), (1, 1, 1))
+            size = cache.size
+            self.assertTrue(cache.clear())
+            self.assertEqual(cache.stats, {'hits': 0, 'misses': 0, 'count': 0, 'size': 0})
+            small = aecResultCache(os.path.join(folder, 'small.db'), maxSize = 2 * size)
+            for index in range(4): small.put(str(index), result)
+            small.get('2')
+            small.put('4', result)
+            self.assertEqual(small.get('2'), result)
+            self.assertIsNone(small.get('3'))
+            self.assertEqual(small.count, 2)
+            writer = sqlite3.connect(small.path, isolation_level = None)
+            writer.execute('BEGIN IMMEDIATE')
+            for index in range(100): self.assertEqual(small.get('4'), result)
+            writer.execute('COMMIT')
+            writer.close()
+            self.assertEqual(small.stats['hits'], 102)
+            self.assertTrue(small.flush())
+
+    def test_site_placement_output(self):
+        param = {'length': 300, 'width': 250, 'height': 25, 'rotation': 60, 'area': 100000, 'seed': 3}
+        result = sitePlacement(**param)
+        glb = sitePlacement(**param, output = 'glb')
+        self.assertEqual(glb['model'], base64.b64decode(result['model']))
+        self.assertEqual(glb['computed'], result['computed'])
+        stream = io.BytesIO()
+        self.assertIs(sitePlacement(**param, output = stream)['model'], stream)
+        self.assertEqual(stream.getvalue(), glb['model'])
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'model.glb')
+            self.assertEqual(sitePlacement(**param, output = path)['model'], path)
+            with open(path, 'rb') as file: self.assertEqual(file.read(), glb['model'])
+
+    def test_site_placement_timings(self):
+        param = {'length': 300, 'width': 250, 'height': 25, 'rotation': 60, 'area': 100000, 'seed': 3}
+        result = sitePlacement(**param, timings = True)
+        timings = result.pop('timings')
+        self.assertEqual(result, sitePlacement(**param))
+        self.assertNotIn('timings', sitePlacement(**param))
+        self.assertEqual(set(timings['seconds']), {'site', 'placement', 'stacking', 'meshing', 
+                                                   'model', 'encoding', 'total'})
+        self.assertGreaterEqual(timings['seconds']['total'], sum(timings['seconds'].values()) / 2)
+        counters = timings['counters']
+        self.assertGreaterEqual(counters['trials'], 1)
+        self.assertEqual(counters['floors'], result['computed']['floors'])
+        self.assertEqual(counters['bytes'], len(result['model']))
+        self.assertGreater(counters['vertices'], 0)
+        with tempfile.TemporaryDirectory() as folder:
+            cache = placementCache(os.path.join(folder, 'cache.db'))
+            glb = sitePlacement(**param, cache = cache, output = 'glb', timings = True)
+            self.assertFalse(glb['timings']['counters']['cached'])
+            self.assertEqual(glb['timings']['counters']['bytes'], len(glb['model']))
+            self.assertIn('cache_encoding', glb['timings']['seconds'])
+            cached = sitePlacement(**param, cache = cache, timings = True)['timings']
+            self.assertTrue(cached['counters']['cached'])
+            self.assertEqual(cached['counters']['bytes'], len(result['model']))
+            self.assertNotIn('placement', cached['seconds'])
+
+    def test_site_placement_instances(self):
+        result = sitePlacement(300, 250, 20, 60, 300000, seed = 3)
+        model = base64.b64decode(result['model'])
+        length = struct.unpack('I', model[12:16])[0]
+        gltf = json.loads(model[20:20 + length])
+        floors = gltf['nodes'][2:]
+        self.assertEqual(len(floors), result['computed']['floors'])
+        self.assertEqual(len(gltf['accessors']), 6)
+        self.assertEqual(len(gltf['buffers']), 1)
+        self.assertEqual([floor['name'] for floor in floors], 
+                         ['Floor {}'.format(index) for index in range(1, len(floors) + 1)])
+        self.assertEqual([floor.get('translation', [0] * 3)[2] for floor in floors], 
+                         [index * 20 for index in range(len(floors))])
+
+    @unittest.skipIf(importlib.util.find_spec('matplotlib') is None, 'matplotlib is not installed')
+    def test_site_placement_startup(self):
+        script = ("import sys\n"
+                  "import aecSpace.aecFloor, aecSpace.aecGeometry, aecSpace.aecShaper, aecSpace.aecSpace\n"
+                  "import aecSpace.aecSpaceGLTF, aecSpace.aecSpaceGroup, aecSpace.aecSpacer, SitePlacement\n"
+                  "print('matplotlib' in sys.modules)\n"
+                  "import matplotlib\n"
+                  "print('matplotlib' in sys.modules)\n")
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        output = subprocess.run([sys.executable, '-c', script], cwd = root,
+                                check = True, capture_output = True, text = True).stdout
+        self.assertEqual(output.split(), ['False', 'True'])
 
 if __name__ == 'main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()